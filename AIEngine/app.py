@@ -3,11 +3,14 @@ from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
-import chromadb
-import pandas as pd
-import uuid
+import ast
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from flask_cors import CORS
+from fast_path import FastPathExtractor, is_time_relative
+from response_cache import ResponseCache, file_fingerprint
+from endpoint_index import embedding_function, load_or_build
 
 app = Flask(__name__)
 CORS(app)  # This allows all origins
@@ -44,57 +47,122 @@ prompt = PromptTemplate.from_template(
 
 chain = prompt | llm
 json_parser = JsonOutputParser()
+fast_path = FastPathExtractor()  # Regex / dictionary extraction of the variables, before asking the LLM
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 4))
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", 100))
+llm_pool = ThreadPoolExecutor(max_workers=LLM_CONCURRENCY, thread_name_prefix="llm")
+
+
+def fill_url(url, values):
+    """Replace only the last occurrence of each placeholder."""
+    for key, value in values.items():
+        if key in url:
+            url = url.rsplit(key, 1)  # Split at the last occurrence
+            url = f"{url[0]}{value}{url[1]}" if len(url) > 1 else f"{url[0]}{value}"
+    return url
+
+def extraction_error(error):
+    return {"error": f"Unable to extract the query parameters: {error}"}
 
 class ApiHandler:
     def __init__(self, file_path="my_api_endpoints.csv", vector_store_path="vectorstore"):
         self.file_path = file_path
-        self.data = pd.read_csv(file_path)
-        self.chroma_client = chromadb.PersistentClient(vector_store_path)
-        self.collection = self.chroma_client.get_or_create_collection(name="api_endpoints")
-        self._load_collection()
-
-    def _load_collection(self):
-        """Loads data into the ChromaDB collection if it's empty."""
-        if self.collection.count() == 0:
-            for _, row in self.data.iterrows():
-                self.collection.add(
-                    documents=[row["Description"]],
-                    metadatas=[{
-                        "url": row["url"], 
-                        "variables": row["variables"],
-                        "isFrontend": row["isFrontend"]
-                    }],
-                    ids=[str(uuid.uuid4())]
-                )
+        self.vector_store_path = vector_store_path
+        self.index_fingerprint = file_fingerprint([file_path])
+        self.index = load_or_build(file_path, vector_store_path)  # Memory-mapped, built by endpoint_index.py
+        self.cache = ResponseCache("api", depends_on=[file_path])  # Dropped whenever the CSV changes
+
+    def _current_index(self):
+        """The endpoint index, incrementally rebuilt when the CSV was edited while running."""
+        fingerprint = file_fingerprint([self.file_path])
+        if fingerprint != self.index_fingerprint:
+            self.index_fingerprint = fingerprint
+            self.index = load_or_build(self.file_path, self.vector_store_path)
+        return self.index
 
     def query_api(self, text):
-        """Queries the vector store and extracts relevant information."""
-        results = self.collection.query(
-            query_texts=[text], n_results=1, include=["documents", "metadatas"]
-        )
-        
-        if not results["documents"]:
+        return self.query_batch([text])[0]
+
+    def query_batch(self, texts):
+        """
+        Responses to several questions, in order. Cache misses are embedded in one call and
+        searched together in the endpoint index, then their variables are extracted concurrently (at most LLM_CONCURRENCY
+        LLM calls at a time, shared by all requests).
+        """
+        responses, pending = self.search(texts)
+        extracted = llm_pool.map(lambda args: self.extract(*args), [(texts[index], matches) for index, *_, matches in pending])
+        self.store(texts, responses, pending, extracted)
+        return responses
+
+    def search(self, texts):
+        """
+        (responses with None for the cache misses, [(index, embedding, signature, matched metadatas)] of the misses).
+        Blocking: the async server runs it in a thread pool.
+        """
+        responses = [self.cache.get_exact(text) for text in texts]
+        missing = [index for index, response in enumerate(responses) if response is None]
+        if not missing:
+            return responses, []
+
+        embeddings = embedding_function([texts[index] for index in missing])
+        pending = []
+        for index, embedding in zip(missing, embeddings):
+            signature = fast_path.entities(texts[index])  # Exact hits never pay for the fast-path scan
+            responses[index] = self.cache.get_similar(embedding, signature)
+            if responses[index] is None:
+                pending.append((index, embedding, signature))
+        if not pending:
+            return responses, []
+
+        results = self._current_index().search([embedding for _, embedding, _ in pending], n_results=1)
+        return responses, [(*miss, matches) for miss, matches in zip(pending, results["metadatas"])]
+
+    def store(self, texts, responses, pending, extracted):
+        """Fills in and caches the responses of the searched misses ("today" is not cached past midnight)."""
+        for (index, embedding, signature, _), response in zip(pending, extracted):
+            responses[index] = response
+            if "error" not in response and not is_time_relative(texts[index]):
+                self.cache.put(texts[index], response, embedding, signature)
+
+    def extract(self, text, metadatas):
+        """Fills the variables of the matched endpoint."""
+        plan = self.plan(text, metadatas)
+        if "error" in plan or not plan["unresolved"]:
+            return self.complete(plan)
+        try:
+            response = chain.invoke(input={"fields": str(plan["unresolved"]), "text": text})
+        except Exception as error:  # Timeout, rate limit...: fail this query only, not the whole batch
+            return extraction_error(error)
+        return self.complete(plan, response.content)
+
+    def plan(self, text, metadatas):
+        """Matched endpoint with the variables resolved by the fast path, and those left for the LLM."""
+        if not metadatas:
             return {"error": "No matching API found"}
         
-        description = results["documents"][0][0]
-        metadata = results["metadatas"][0][0]
-        url, fields, is_frontend = metadata["url"], metadata["variables"], metadata["isFrontend"]
-
-        extracted_data = {}
+        metadata = metadatas[0]
+        plan = {"url": metadata["url"], "isFrontend": metadata["isFrontend"], "data": {}, "unresolved": []}
+        fields = metadata["variables"]
         if fields and fields != "[]":
-            response = chain.invoke(input={"fields": fields, "text": text})
+            fields = ast.literal_eval(fields) if isinstance(fields, str) else list(fields)
+            plan["data"], plan["unresolved"] = fast_path.extract(fields, text)
+            fast_path.stats.record(plan["data"], plan["unresolved"])
+        return plan
+
+    def complete(self, plan, llm_content=None):
+        """Response of a plan, merging the LLM answer for the unresolved variables."""
+        if "error" in plan:
+            return plan
+        extracted_data = dict(plan["data"])
+        if llm_content is not None:
             try:
-                extracted_data = json_parser.parse(response.content)
+                llm_data = json_parser.parse(llm_content)
             except OutputParserException:
                 return {"error": "Context too large. Unable to parse response."}
+            extracted_data.update({key: value for key, value in llm_data.items() if key in plan["unresolved"]})
 
-            # Replace only the last occurrence of each placeholder
-            for key, value in extracted_data.items():
-                if key in url:
-                    url = url.rsplit(key, 1)  # Split at the last occurrence
-                    url = f"{url[0]}{value}{url[1]}" if len(url) > 1 else f"{url[0]}{value}"
-
-        return {"url": url, "data": extracted_data, "isFrontend": is_frontend}
+        url = fill_url(plan["url"], extracted_data)
+        return {"url": url, "data": extracted_data, "isFrontend": plan["isFrontend"]}
 
 api_handler = ApiHandler()
 
@@ -109,6 +177,31 @@ def get_api():
     response = api_handler.query_api(query_text)
     return jsonify(response)
 
+@app.route("/api/batch", methods=["POST"])
+def get_api_batch():
+    """{"queries": [...]} -> {"results": [...]} in the same order (voice front-end, evaluation harness)."""
+    data = request.json or {}
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "No queries provided"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+
+    texts = [str(query).strip() for query in queries]
+    answered = [index for index, text in enumerate(texts) if text]
+    results = [{"error": "No text provided"}] * len(texts)
+    for index, response in zip(answered, api_handler.query_batch([texts[index] for index in answered])):
+        results[index] = response
+    return jsonify({"results": results})
+
+@app.route("/api/stats", methods=["GET"])
+def get_api_stats():
+    """Fast-path hit rate (queries answered without calling the LLM for their variables) and cache metrics."""
+    return jsonify({
+        **fast_path.stats.snapshot(),
+        "cache": {"api": api_handler.cache.stats(), "insights": insights_cache.stats()},
+    })
+
 # Insights generation prompt
 insights_prompt = PromptTemplate.from_template(
     """
@@ -131,6 +224,7 @@ insights_prompt = PromptTemplate.from_template(
     """
 )
 insights_chain = insights_prompt | llm
+insights_cache = ResponseCache("insights", similarity=None, fold=False)  # Same data -> same insights
 
 @app.route("/insights", methods=["POST"])
 def get_insights():  # Renamed function to avoid conflicts
@@ -140,6 +234,10 @@ def get_insights():  # Renamed function to avoid conflicts
     
     if not query_text:
         return jsonify({"error": "No text provided"}), 400
+
+    cached, _ = insights_cache.lookup(query_text)
+    if cached is not None:
+        return jsonify(cached)
     
     response = insights_chain.invoke(input={"text": query_text})  # Fixed input key
     
@@ -151,6 +249,7 @@ def get_insights():  # Renamed function to avoid conflicts
     except OutputParserException:
         return jsonify({"error": "Context too large. Unable to parse response."}), 400
 
+    insights_cache.put(query_text, extracted_data)
     return jsonify(extracted_data)
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""
+Async (ASGI) serving mode of the AIEngine, with the same routes and responses as app.py.
+
+The LLM calls go through LangChain's `ainvoke`, so a slow Groq answer no longer holds a worker
+thread; the blocking parts (fast-path matching, embeddings, endpoint index) run in a bounded thread
+pool off the event loop. Concurrency is set by configuration instead of by threads:
+  MAX_CONCURRENT_REQUESTS  requests in flight before the app answers 503 (default 200)
+  LLM_CONCURRENCY          concurrent LLM calls, shared by all requests (default 4)
+  VECTOR_THREADS           threads for embedding / endpoint index lookups (default 4)
+
+Usage (from AIEngine/):
+    python asgi_app.py                       # port 8888, uvloop when installed
+    uvicorn asgi_app:app --port 8888         # same limits, they are enforced by the app itself
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+import uvicorn
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from langchain_core.exceptions import OutputParserException
+from app import (api_handler, chain, insights_chain, insights_cache, json_parser, fast_path, extraction_error,
+                 LLM_CONCURRENCY, MAX_BATCH_QUERIES)
+
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 200))
+VECTOR_THREADS = int(os.getenv("VECTOR_THREADS", 4))
+
+app = FastAPI(title="InvokEd AIEngine")
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+vector_pool = ThreadPoolExecutor(max_workers=VECTOR_THREADS, thread_name_prefix="vector")
+llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)  # Bound to the running loop on first use
+request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+
+@app.middleware("http")
+async def limit_concurrency(request, call_next):
+    """Answer 503 beyond MAX_CONCURRENT_REQUESTS in flight, however the app is launched."""
+    if request_slots.locked():
+        return JSONResponse({"error": "Server busy, please retry"}, status_code=503)
+    async with request_slots:
+        return await call_next(request)
+
+
+class Query(BaseModel):
+    query: str = ""
+
+
+class BatchQuery(BaseModel):
+    queries: List[Any] = []
+
+
+class InsightsRequest(BaseModel):
+    text: Any = ""
+
+
+async def blocking(function, *args):
+    return await asyncio.get_running_loop().run_in_executor(vector_pool, function, *args)
+
+
+async def extract(text, metadatas):
+    """ApiHandler.extract with the LLM awaited instead of blocking a thread."""
+    plan = await blocking(api_handler.plan, text, metadatas)  # Regex / dictionary matching, off the event loop
+    if "error" in plan or not plan["unresolved"]:
+        return api_handler.complete(plan)
+    async with llm_slots:
+        response = await chain.ainvoke(input={"fields": str(plan["unresolved"]), "text": text})
+    return api_handler.complete(plan, response.content)
+
+
+async def query_batch(texts):
+    responses, pending = await blocking(api_handler.search, texts)
+    extracted = await asyncio.gather(*(extract(texts[index], matches) for index, *_, matches in pending),
+                                     return_exceptions=True)
+    # One failed LLM call (timeout, rate limit...) only fails its own query
+    extracted = [extraction_error(result) if isinstance(result, Exception) else result for result in extracted]
+    await blocking(api_handler.store, texts, responses, pending, extracted)
+    return responses
+
+
+@app.post("/api")
+async def get_api(body: Query):
+    query_text = body.query.strip()
+
+    if not query_text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+
+    return (await query_batch([query_text]))[0]
+
+
+@app.post("/api/batch")
+async def get_api_batch(body: BatchQuery):
+    if not body.queries:
+        return JSONResponse({"error": "No queries provided"}, status_code=400)
+    if len(body.queries) > MAX_BATCH_QUERIES:
+        return JSONResponse({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}, status_code=400)
+
+    texts = [str(query).strip() for query in body.queries]
+    answered = [index for index, text in enumerate(texts) if text]
+    results = [{"error": "No text provided"}] * len(texts)
+    for index, response in zip(answered, await query_batch([texts[index] for index in answered])):
+        results[index] = response
+    return {"results": results}
+
+
+@app.get("/api/stats")
+async def get_api_stats():
+    return {
+        **fast_path.stats.snapshot(),
+        "cache": {"api": api_handler.cache.stats(), "insights": insights_cache.stats()},
+    }
+
+
+@app.post("/insights")
+async def get_insights(body: InsightsRequest):
+    query_text = str(body.text) if body.text else ""
+
+    if not query_text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+
+    cached, _ = insights_cache.lookup(query_text)
+    if cached is not None:
+        return cached
+
+    async with llm_slots:
+        response = await insights_chain.ainvoke(input={"text": query_text})
+
+    try:
+        response_content = response.content if hasattr(response, "content") else str(response)
+        extracted_data = json_parser.parse(response_content)
+    except OutputParserException:
+        return JSONResponse({"error": "Context too large. Unable to parse response."}, status_code=400)
+
+    insights_cache.put(query_text, extracted_data)
+    return extracted_data
+
+
+if __name__ == "__main__":
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    uvicorn.run(app, host="0.0.0.0", port=8888, loop=loop)
@@ -8,9 +8,7 @@ Original open-source code inspired from:
 ##########
 
 import cv2
-import pickle
 import numpy as np
-import os
 video=cv2.VideoCapture(0)
 facedetect=cv2.CascadeClassifier('data/haarcascade_frontalface_default.xml')
 
@@ -43,23 +41,7 @@ faces_data=np.asarray(faces_data)
 faces_data=faces_data.reshape(100, -1)
 
 
-if 'names.pkl' not in os.listdir('data/'):
-    names=[name]*100
-    with open('data/names.pkl', 'wb') as f:
-        pickle.dump(names, f)
-else:
-    with open('data/names.pkl', 'rb') as f:
-        names=pickle.load(f)
-    names=names+[name]*100
-    with open('data/names.pkl', 'wb') as f:
-        pickle.dump(names, f)
-
-if 'faces_data.pkl' not in os.listdir('data/'):
-    with open('data/faces_data.pkl', 'wb') as f:
-        pickle.dump(faces_data, f)
-else:
-    with open('data/faces_data.pkl', 'rb') as f:
-        faces=pickle.load(f)
-    faces=np.append(faces, faces_data, axis=0)
-    with open('data/faces_data.pkl', 'wb') as f:
-        pickle.dump(faces, f)
\ No newline at end of file
+# Append to the memory-mapped gallery store and refresh this student's centroids (data/face_gallery.npz)
+from recognition import enrol_student
+gallery=enrol_student(name, faces_data)
+print(f"Gallery updated: {gallery.students} students")
@@ -0,0 +1,164 @@
+"""
+Headless batch attendance from recorded classroom videos or folders of images.
+
+Sampled frames are decoded and recognised in parallel by a process pool (every worker loads
+the gallery and the Haar cascade once and decodes its own segment of a video). Detections
+are aggregated per student over the whole clip, after dropping faces rejected as unknown by
+predict_with_confidence: a student is marked present when they were
+recognised on at least --min-frames sampled frames with a mean similarity of at least
+--min-similarity. One consolidated batch is then queued in the kiosk outbox and flushed to
+/attendance/upsert/ (rows the server cannot take yet stay in the outbox for the kiosk).
+No window is ever opened, so this also serves as a camera-free throughput benchmark.
+
+Usage (from AIEngine/attendance/):
+    python batch_attendance.py lecture.mp4 photos/ [--date 2025-02-03] [--every 5] [--workers 4] [--dry-run]
+"""
+
+import os
+import cv2
+import json
+import time
+import argparse
+from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from recognition import FaceGallery, GALLERY_PATH, UNKNOWN, crop_faces
+from detection import detect_faces, downscale
+from uploader import AttendanceUploader
+
+CASCADE_PATH = 'data/haarcascade_frontalface_default.xml'
+API_URL = "http://127.0.0.1:8000/attendance/upsert/"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SEGMENT_FRAMES = 300  # Frames of a video decoded by one task
+MIN_FRAMES = 3
+MIN_SIMILARITY = 0.7  # Mean over the accepted matches, which are all >= MATCH_THRESHOLD already
+
+_worker = {}
+
+
+def init_worker(gallery_path, scale):
+    cv2.setNumThreads(1)  # Parallelism comes from the process pool
+    _worker['gallery'] = FaceGallery.load(gallery_path)
+    _worker['facedetect'] = cv2.CascadeClassifier(CASCADE_PATH)
+    _worker['scale'] = scale
+
+
+def recognise(frame):
+    """[(student_id, similarity)] of the faces of one frame."""
+    _, boxes = detect_faces(_worker['facedetect'], downscale(frame, _worker['scale']), _worker['scale'])
+    if not boxes:
+        return []
+    labels, similarities, _ = _worker['gallery'].predict_with_confidence(crop_faces(frame, boxes))
+    return [(str(label), float(score)) for label, score in zip(labels, similarities) if label != UNKNOWN]
+
+
+def video_segment(task):
+    """Decode and recognise every `every`-th frame of [start, stop) of a video."""
+    path, start, stop, every = task
+    video = cv2.VideoCapture(path)
+    video.set(cv2.CAP_PROP_POS_FRAMES, start)
+    results = []
+    for position in range(start, stop):
+        if (position - start) % every:
+            if not video.grab():  # Skipped frames are not decoded
+                break
+            continue
+        ret, frame = video.read()
+        if not ret:
+            break
+        results.append(recognise(frame))
+    video.release()
+    return results
+
+
+def image_batch(paths):
+    results = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is not None:
+            results.append(recognise(frame))
+    return results
+
+
+def plan_tasks(inputs, every):
+    """Split the inputs into (function, argument) tasks of similar size."""
+    tasks = []
+    for source in inputs:
+        if os.path.isdir(source):
+            images = sorted(os.path.join(source, name) for name in os.listdir(source)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+            step = max(1, SEGMENT_FRAMES // every)
+            tasks += [(image_batch, images[i:i + step]) for i in range(0, len(images), step)]
+        else:
+            video = cv2.VideoCapture(source)
+            frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+            video.release()
+            if frame_count <= 0:
+                print(f"Skipping {source}: not a readable video")
+                continue
+            tasks += [(video_segment, (source, start, min(start + SEGMENT_FRAMES, frame_count), every))
+                      for start in range(0, frame_count, SEGMENT_FRAMES)]
+    return tasks
+
+
+def aggregate(frame_results, min_frames=MIN_FRAMES, min_similarity=MIN_SIMILARITY):
+    """{student_id: (frames seen, mean similarity)} of the students that pass both thresholds."""
+    frames_seen, similarity = defaultdict(int), defaultdict(float)
+    for faces in frame_results:
+        best = {}
+        for student_id, score in faces:  # A student counts once per frame, with their best match
+            best[student_id] = max(score, best.get(student_id, -1.0))
+        for student_id, score in best.items():
+            frames_seen[student_id] += 1
+            similarity[student_id] += score
+    present = {}
+    for student_id, count in frames_seen.items():
+        mean = similarity[student_id] / count
+        if count >= min_frames and mean >= min_similarity:
+            present[student_id] = (count, mean)
+    return present
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help="video files and/or directories of images")
+    parser.add_argument('--date', default=datetime.now().strftime("%Y-%m-%d"))
+    parser.add_argument('--every', type=int, default=5, help="recognise every n-th video frame")
+    parser.add_argument('--scale', type=float, default=0.5, help="detection downscale factor")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--min-frames', type=int, default=MIN_FRAMES)
+    parser.add_argument('--min-similarity', type=float, default=MIN_SIMILARITY)
+    parser.add_argument('--gallery', default=GALLERY_PATH)
+    parser.add_argument('--api-url', default=API_URL)
+    parser.add_argument('--dry-run', action='store_true', help="print the batch instead of posting it")
+    args = parser.parse_args()
+
+    tasks = plan_tasks(args.inputs, max(1, args.every))
+    started = time.perf_counter()
+    frame_results = []
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(args.gallery, args.scale)) as pool:
+        futures = [pool.submit(function, argument) for function, argument in tasks]
+        for future in futures:
+            frame_results += future.result()
+    elapsed = time.perf_counter() - started
+
+    faces = sum(len(faces) for faces in frame_results)
+    print(f"Recognised {len(frame_results)} frames ({faces} faces) in {elapsed:.1f}s "
+          f"-> {len(frame_results) / elapsed if elapsed else 0:.1f} frames/s with {args.workers} workers")
+
+    present = aggregate(frame_results, args.min_frames, args.min_similarity)
+    for student_id, (count, mean) in sorted(present.items()):
+        print(f"  {student_id}: seen on {count} frames, mean similarity {mean:.2f}")
+    attendance_list = [{"StudentID": student_id, "Date": args.date, "Status": 1} for student_id in sorted(present)]
+
+    if args.dry_run or not attendance_list:
+        print(json.dumps(attendance_list, indent=2))
+        return
+    uploader = AttendanceUploader(args.api_url)
+    uploader.enqueue(attendance_list)
+    uploader.flush()
+    print(uploader)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of the kiosk detection scheduler on a recorded video.
+
+Every configuration replays the same frames through a DetectionScheduler and is compared
+with the baseline (full-resolution detection + recognition on every frame):
+  ms/frame     average processing time per frame
+  detect runs  frames on which Haar detection + recognition actually ran
+  agreement    share of baseline faces (IoU >= 0.5) reported with the same student (or both Unknown)
+  extra        faces reported that the baseline did not see
+
+Usage (from AIEngine/attendance/):
+    python benchmark_detection.py recording.mp4 [--frames 600] [--every 1 3 5 10] [--scales 1.0 0.5 0.33]
+"""
+
+import argparse
+import time
+import cv2
+from recognition import FaceGallery, GALLERY_PATH
+from detection import DetectionScheduler, iou
+
+CASCADE_PATH = 'data/haarcascade_frontalface_default.xml'
+
+
+def read_frames(path, limit):
+    video = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = video.read()
+        if not ret:
+            break
+        frames.append(frame)
+    video.release()
+    return frames
+
+
+def compare(baseline, result):
+    """(matched with the same student, extra faces) of one frame."""
+    matched, used = 0, set()
+    for box, student_id, *_ in baseline:
+        for index, (other_box, other_id, *_) in enumerate(result):
+            if index not in used and iou(box, other_box) >= 0.5:
+                used.add(index)
+                matched += other_id == student_id
+                break
+    return matched, len(result) - len(used)
+
+
+def run(frames, gallery, detect_every, scale):
+    scheduler = DetectionScheduler(cv2.CascadeClassifier(CASCADE_PATH), gallery, detect_every=detect_every, scale=scale)
+    results = []
+    started = time.perf_counter()
+    for frame in frames:
+        results.append(scheduler.process(frame))
+    elapsed = (time.perf_counter() - started) * 1000
+    return results, elapsed / max(1, len(frames)), scheduler.counters['detections']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video')
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--every', type=int, nargs='+', default=[1, 3, 5, 10])
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 0.5, 0.33])
+    parser.add_argument('--gallery', default=GALLERY_PATH)
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    gallery = FaceGallery.load(args.gallery)
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]} from {args.video}")
+
+    baseline, baseline_ms, _ = run(frames, gallery, 1, 1.0)
+    faces = sum(len(faces) for faces in baseline)
+    print(f"\n{'every':>5} {'scale':>5} {'ms/frame':>9} {'speedup':>8} {'detect runs':>11} {'agreement':>9} {'extra':>6}")
+    for detect_every in args.every:
+        for scale in args.scales:
+            results, ms, detections = run(frames, gallery, detect_every, scale)
+            matched = extra = 0
+            for expected, result in zip(baseline, results):
+                frame_matched, frame_extra = compare(expected, result)
+                matched += frame_matched
+                extra += frame_extra
+            agreement = matched / faces if faces else 1.0
+            print(f"{detect_every:>5} {scale:>5.2f} {ms:>9.2f} {baseline_ms / ms:>7.1f}x "
+                  f"{detections:>11} {agreement:>8.1%} {extra:>6}")
+
+
+if __name__ == '__main__':
+    main()
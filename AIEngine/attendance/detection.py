@@ -0,0 +1,160 @@
+"""
+Detection scheduler of the attendance kiosk.
+
+Haar detection on every full-resolution frame is the most expensive step of the kiosk, and
+most frames show the same faces as the frame before. The scheduler therefore
+  - detects on a downscaled grey frame (DETECT_SCALE) and maps the boxes back,
+  - follows already identified faces between detections by template matching each face in a
+    small window around its previous box (on the same downscaled frame),
+  - re-runs detection + recognition only every DETECT_EVERY frames, or as soon as a track is lost.
+
+Every recognition run adds a (label, similarity) vote to the track it belongs to (matched to the
+previous tracks by box overlap). A track is only `confirmed` - and only then committed as
+attendance by the kiosk - once MIN_VOTES of its last VOTE_WINDOW votes agree on one student;
+faces rejected by predict_with_confidence vote UNKNOWN.
+
+DETECT_EVERY=1, DETECT_SCALE=1.0 is the previous behaviour (detect and recognise every frame).
+See benchmark_detection.py for measurements on a recorded video.
+"""
+
+import cv2
+from collections import Counter, deque
+from recognition import crop_faces, MATCH_THRESHOLD, MIN_MARGIN, UNKNOWN
+
+DETECT_SCALE = 0.5
+DETECT_EVERY = 5
+TRACK_MARGIN = 0.5  # Search window around the previous box, as a fraction of the face size
+TRACK_MIN_SCORE = 0.6  # Normalised cross-correlation below this means the face is lost
+CASCADE_WINDOW = 24  # Native window of haarcascade_frontalface_default: no smaller face can be found
+MIN_FACE_SIZE = 30  # Full-resolution pixels; smaller faces upscale too much into the 50x50 recognition crop
+VOTE_WINDOW = 5  # Recognition votes remembered per track
+MIN_VOTES = 3  # Agreeing votes needed before a track is confirmed
+TRACK_MATCH_IOU = 0.3  # Overlap linking a new detection to a previous track (keeps its votes)
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    overlap = w * h
+    return overlap / (aw * ah + bw * bh - overlap) if overlap else 0.0
+
+
+def downscale(frame, scale):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale == 1.0:
+        return gray
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def detect_faces(facedetect, small, scale):
+    """
+    Haar boxes found on a downscaled grey frame, as (downscaled boxes, full-resolution boxes).
+    Faces smaller than the cascade window in the downscaled frame (24 / scale full-resolution
+    pixels) are never found, whatever MIN_FACE_SIZE says.
+    """
+    min_size = max(CASCADE_WINDOW, int(MIN_FACE_SIZE * scale))
+    boxes = [tuple(int(v) for v in box) for box in facedetect.detectMultiScale(small, 1.3, 5, minSize=(min_size, min_size))]
+    return boxes, [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+
+class FaceTrack:
+    """One face: box and template in downscaled coordinates, and its recent recognition votes."""
+
+    def __init__(self, box, template, votes):
+        self.box = box
+        self.template = template
+        self.votes = votes
+
+    def consensus(self, min_votes=MIN_VOTES):
+        """(student_id, vote ratio, confirmed) of the track; UNKNOWN until a student has votes."""
+        counts = Counter(label for label, _ in self.votes if label != UNKNOWN)
+        if not counts:
+            return UNKNOWN, 0.0, False
+        student_id, count = counts.most_common(1)[0]
+        ratio = count / len(self.votes)
+        return student_id, ratio, count >= min_votes and ratio > 0.5
+
+
+class DetectionScheduler:
+    def __init__(self, facedetect, gallery, detect_every=DETECT_EVERY, scale=DETECT_SCALE,
+                 track_margin=TRACK_MARGIN, track_min_score=TRACK_MIN_SCORE, threshold=MATCH_THRESHOLD,
+                 min_margin=MIN_MARGIN, min_votes=MIN_VOTES, vote_window=VOTE_WINDOW):
+        self.facedetect = facedetect
+        self.gallery = gallery
+        self.detect_every = max(1, detect_every)
+        self.scale = scale
+        self.track_margin = track_margin
+        self.track_min_score = track_min_score
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.min_votes = min_votes
+        self.vote_window = vote_window
+        self.tracks = []
+        self.frames_since_detection = self.detect_every  # Detect on the first frame
+        self.counters = {'frames': 0, 'detections': 0, 'tracked': 0, 'lost': 0}
+
+    def to_frame(self, box):
+        """Downscaled (x, y, w, h) -> full-resolution box."""
+        return tuple(int(round(value / self.scale)) for value in box)
+
+    def follow(self, small, track):
+        """Template-match a track in a window around its last box; None when the face is lost."""
+        x, y, w, h = track.box
+        margin = int(self.track_margin * max(w, h))
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        window = small[y0:y + h + margin, x0:x + w + margin]
+        if window.shape[0] < h or window.shape[1] < w:
+            return None
+        scores = cv2.matchTemplate(window, track.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if score < self.track_min_score:
+            return None
+        box = (x0 + dx, y0 + dy, w, h)
+        return FaceTrack(box, small[box[1]:box[1] + h, box[0]:box[0] + w], track.votes)
+
+    def previous_votes(self, box):
+        """Vote buffer of the previous track overlapping box the most, or a new one."""
+        overlaps = [(iou(box, track.box), track) for track in self.tracks]
+        overlap, track = max(overlaps, key=lambda pair: pair[0], default=(0.0, None))
+        if track is not None and overlap >= TRACK_MATCH_IOU:
+            self.tracks.remove(track)  # One previous track per new detection
+            return track.votes
+        return deque(maxlen=self.vote_window)
+
+    def detect(self, frame, small):
+        boxes, full_boxes = detect_faces(self.facedetect, small, self.scale)
+        labels, similarities, _ = self.gallery.predict_with_confidence(
+            crop_faces(frame, full_boxes), self.threshold, self.min_margin)
+        tracks = []
+        for box, label, similarity in zip(boxes, labels, similarities):
+            votes = self.previous_votes(box)
+            votes.append((str(label), float(similarity)))
+            tracks.append(FaceTrack(box, small[box[1]:box[1] + box[3], box[0]:box[0] + box[2]], votes))
+        self.tracks = tracks
+        self.frames_since_detection = 0
+        self.counters['detections'] += 1
+
+    def process(self, frame):
+        """[(full-resolution box, student_id, vote ratio, confirmed)] of the faces in frame."""
+        self.counters['frames'] += 1
+        self.frames_since_detection += 1
+        small = downscale(frame, self.scale)
+
+        followed = None
+        if self.tracks and self.frames_since_detection < self.detect_every:
+            followed = [self.follow(small, track) for track in self.tracks]
+            if any(track is None for track in followed):
+                self.counters['lost'] += 1
+                followed = None
+        if followed is not None:
+            self.tracks = followed
+            self.counters['tracked'] += 1
+        elif self.tracks or self.frames_since_detection >= self.detect_every:
+            self.detect(frame, small)
+        return [(self.to_frame(track.box), *track.consensus(self.min_votes)) for track in self.tracks]
+
+    def __str__(self):
+        c = self.counters
+        return f"detect {c['detections']}/{c['frames']} frames, tracked {c['tracked']}, lost {c['lost']}"
@@ -0,0 +1,167 @@
+"""
+Append-only, memory-mapped store of the enrolment face crops.
+
+    data/gallery/faces.u8        raw uint8 rows (50*50*3 values each), only ever appended to
+                                 (faces-<generation>.u8 once compacted)
+    data/gallery/manifest.json   data file name, row shape, row count and the label index:
+                                 student -> [[start, count], ...]
+
+Enrolling appends the new rows and rewrites the small manifest, so it costs O(new samples).
+Opening the store maps the data file read-only (np.memmap), nothing is copied into RAM.
+Removing or re-enrolling a student only edits the label index; the orphaned rows are
+reclaimed by `compact`, which writes the live rows to a new data file and switches the
+manifest to it, so the data file and the index it describes always change together.
+
+    python gallery_store.py list
+    python gallery_store.py compact
+    python gallery_store.py import      # one-off migration of data/faces_data.pkl + data/names.pkl
+"""
+
+import os
+import sys
+import json
+import pickle
+import numpy as np
+
+STORE_DIR = 'data/gallery'
+DATA_FILE = 'faces.u8'
+MANIFEST_FILE = 'manifest.json'
+ROW_SHAPE = (50 * 50 * 3,)
+DTYPE = np.uint8
+
+
+class FaceStore:
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self.manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'dtype': np.dtype(DTYPE).name, 'row_shape': list(ROW_SHAPE), 'rows': 0, 'students': {}}
+
+    @property
+    def data_path(self):
+        return os.path.join(self.path, self.manifest.get('data_file', DATA_FILE))
+
+    @property
+    def row_size(self):
+        return int(np.prod(self.manifest['row_shape']))
+
+    @property
+    def students(self):
+        return sorted(self.manifest['students'])
+
+    def _save_manifest(self):
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, self.manifest_path)  # Atomic, a crash never leaves a half-written index
+
+    def append(self, label, faces):
+        """Append the crops of one student; only the new rows are written."""
+        faces = np.ascontiguousarray(faces, dtype=self.manifest['dtype']).reshape(-1, self.row_size)
+        os.makedirs(self.path, exist_ok=True)
+        start = self.manifest['rows']
+        with open(self.data_path, 'r+b' if os.path.exists(self.data_path) else 'wb') as f:
+            f.seek(start * self.row_size)
+            f.truncate()  # Drop rows of an append that crashed before its manifest was written
+            f.write(faces.tobytes())
+        self.manifest['rows'] = start + len(faces)
+        self.manifest['students'].setdefault(str(label), []).append([start, len(faces)])
+        self._save_manifest()
+
+    def remove(self, label):
+        """Forget a student; the rows stay in the data file until the next compact()."""
+        removed = self.manifest['students'].pop(str(label), None) is not None
+        if removed:
+            self._save_manifest()
+        return removed
+
+    def replace(self, label, faces):
+        """Re-enrol a student with new crops."""
+        self.manifest['students'].pop(str(label), None)
+        self.append(label, faces)
+
+    def faces(self):
+        """Read-only memory map of every stored row (including orphaned ones)."""
+        if not self.manifest['rows']:
+            return np.empty((0, self.row_size), dtype=self.manifest['dtype'])
+        return np.memmap(self.data_path, dtype=self.manifest['dtype'], mode='r',
+                         shape=(self.manifest['rows'], self.row_size))
+
+    def rows_of(self, label):
+        spans = self.manifest['students'].get(str(label), [])
+        return np.concatenate([np.arange(start, start + count) for start, count in spans] or [np.empty(0, int)])
+
+    def faces_of(self, label):
+        return self.faces()[self.rows_of(label)]
+
+    def index(self):
+        """(row indices, labels) of every live row, in storage order."""
+        spans = sorted((start, count, label) for label, student_spans in self.manifest['students'].items()
+                       for start, count in student_spans)
+        rows = [np.arange(start, start + count) for start, count, _ in spans]
+        labels = [np.full(count, label) for _, count, label in spans]
+        if not rows:
+            return np.empty(0, int), np.empty(0, str)
+        return np.concatenate(rows), np.concatenate(labels)
+
+    def compact(self):
+        """
+        Copy the live rows to a new data file (the one full rewrite, run occasionally).
+        The single atomic manifest replace switches to the new file and its index together;
+        a crash before it leaves the old file and manifest in use, and the unreferenced
+        file is deleted by the next compact().
+        """
+        rows, _ = self.index()
+        faces = self.faces()
+        generation = self.manifest.get('generation', 0) + 1
+        data_file = f'faces-{generation}.u8'
+        students, offset = {}, 0
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, data_file), 'wb') as f:
+            for label in self.students:
+                student_rows = self.rows_of(label)
+                f.write(np.ascontiguousarray(faces[student_rows]).tobytes())
+                students[label] = [[offset, len(student_rows)]]
+                offset += len(student_rows)
+            f.flush()
+            os.fsync(f.fileno())  # On disk before the manifest points at it
+        del faces
+        reclaimed = self.manifest['rows'] - len(rows)
+        self.manifest.update(data_file=data_file, generation=generation, rows=offset, students=students)
+        self._save_manifest()
+        for name in os.listdir(self.path):
+            if name.endswith('.u8') and name != data_file:
+                try:
+                    os.remove(os.path.join(self.path, name))  # Previous data file, or one of a crashed compact()
+                except OSError:
+                    pass  # Still mapped by a reader (Windows), removed by the next compact()
+        return reclaimed
+
+    def import_pickles(self, faces_path='data/faces_data.pkl', names_path='data/names.pkl'):
+        """Move the legacy pickled gallery into the store, one append per student."""
+        with open(names_path, 'rb') as w:
+            labels = np.asarray(pickle.load(w))
+        with open(faces_path, 'rb') as f:
+            faces = pickle.load(f)
+        for label in dict.fromkeys(labels.tolist()):
+            self.append(label, faces[labels == label])
+        return len(labels)
+
+
+if __name__ == '__main__':
+    store = FaceStore()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'list':
+        for label in store.students:
+            print(f"{label}: {len(store.rows_of(label))} samples")
+        print(f"{store.manifest['rows']} rows stored, {len(store.index()[0])} live")
+    elif command == 'compact':
+        print(f"Reclaimed {store.compact()} rows")
+    elif command == 'import':
+        print(f"Imported {store.import_pickles()} samples into {STORE_DIR}")
+    else:
+        print(__doc__)
@@ -0,0 +1,185 @@
+"""
+Producer / consumer pipeline of the attendance kiosk.
+
+    capture thread --(DropOldestQueue)--> recognition workers --(DropOldestQueue)--> display (main thread)
+                                                                                       |
+                                                    uploader thread (SQLite outbox) <--+ recognised students
+
+Queues between stages are small and drop the oldest frame when full, so a slow detection
+frame never blocks capture; the display always shows the newest result. Uploads go through
+uploader.AttendanceUploader, which never blocks the display loop on the network.
+Every stage records its throughput and latency in a StageStats.
+"""
+
+import cv2
+import time
+import queue
+import threading
+from collections import deque
+from detection import DetectionScheduler
+
+FRAME_QUEUE_SIZE = 2
+RESULT_QUEUE_SIZE = 2
+STATS_WINDOW = 60
+
+
+class StageStats:
+    """Thread-safe counters of one stage: items processed, items dropped, rolling latency / throughput."""
+
+    def __init__(self, name, window=STATS_WINDOW):
+        self.name = name
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=window)
+        self.finished_at = deque(maxlen=window)
+
+    def record(self, started):
+        now = time.perf_counter()
+        with self.lock:
+            self.processed += 1
+            self.latencies.append((now - started) * 1000)
+            self.finished_at.append(now)
+
+    def drop(self):
+        with self.lock:
+            self.dropped += 1
+
+    def snapshot(self):
+        with self.lock:
+            latencies = list(self.latencies)
+            finished_at = list(self.finished_at)
+            processed, dropped = self.processed, self.dropped
+        span = finished_at[-1] - finished_at[0] if len(finished_at) > 1 else 0
+        return {
+            'stage': self.name,
+            'processed': processed,
+            'dropped': dropped,
+            'per_second': (len(finished_at) - 1) / span if span else 0.0,
+            'avg_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+            'max_ms': max(latencies, default=0.0),
+        }
+
+    def __str__(self):
+        s = self.snapshot()
+        return (f"{s['stage']}: {s['per_second']:.1f}/s, avg {s['avg_ms']:.1f} ms, max {s['max_ms']:.1f} ms, "
+                f"dropped {s['dropped']}")
+
+
+class DropOldestQueue(queue.Queue):
+    """Bounded queue whose put never blocks: when full, the oldest item is discarded (stale frame)."""
+
+    def __init__(self, maxsize, stats=None):
+        super().__init__(maxsize)
+        self.stats = stats
+
+    def put_latest(self, item):
+        while True:
+            try:
+                self.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    if self.stats:
+                        self.stats.drop()
+                except queue.Empty:
+                    pass
+
+
+class CaptureThread(threading.Thread):
+    """Reads the camera as fast as it delivers and hands every frame to the recognition queue."""
+
+    def __init__(self, video, frames, stop_event):
+        super().__init__(name='capture', daemon=True)
+        self.video = video
+        self.frames = frames
+        self.stop_event = stop_event
+        self.stats = StageStats('capture')
+        self.frames.stats = self.stats  # Frames dropped from the queue are counted against capture
+        self.frame_id = 0
+
+    def run(self):
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            ret, frame = self.video.read()
+            if not ret or frame is None:
+                continue  # Skip processing if frame capture fails
+            self.frame_id += 1
+            self.frames.put_latest((self.frame_id, started, frame))
+            self.stats.record(started)
+
+
+class RecognitionWorker(threading.Thread):
+    """
+    Detects, tracks and recognises the faces of queued frames through a DetectionScheduler.
+    OpenCV and NumPy release the GIL, so several workers can run in parallel; each owns its
+    CascadeClassifier (not thread-safe to share) and its tracks. Tracking works best on
+    consecutive frames, i.e. with a single worker.
+    """
+
+    def __init__(self, index, cascade_path, gallery, frames, results, stats, stop_event, detection=None):
+        super().__init__(name=f'recognition-{index}', daemon=True)
+        self.scheduler = DetectionScheduler(cv2.CascadeClassifier(cascade_path), gallery, **(detection or {}))
+        self.frames = frames
+        self.results = results
+        self.stats = stats
+        self.stop_event = stop_event
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                frame_id, captured, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            detections = self.scheduler.process(frame)
+            self.stats.record(started)
+            self.results.put_latest((frame_id, captured, frame, detections))
+
+
+class KioskPipeline:
+    """Starts / stops the capture, recognition and upload threads around a display loop."""
+
+    def __init__(self, video, cascade_path, gallery, uploader, workers=1, detection=None):
+        self.stop_event = threading.Event()
+        self.frames = DropOldestQueue(FRAME_QUEUE_SIZE)
+        self.results_stats = StageStats('display')
+        self.results = DropOldestQueue(RESULT_QUEUE_SIZE, self.results_stats)
+        self.capture = CaptureThread(video, self.frames, self.stop_event)
+        self.recognition_stats = StageStats('recognition')
+        self.workers = [
+            RecognitionWorker(index, cascade_path, gallery, self.frames, self.results,
+                              self.recognition_stats, self.stop_event, detection)
+            for index in range(workers)
+        ]
+        self.uploader = uploader
+        self.last_frame_id = 0
+
+    def start(self):
+        for thread in [self.capture, *self.workers, self.uploader]:
+            thread.start()
+        return self
+
+    def latest(self, timeout=0.05):
+        """Newest recognised (frame, detections), or None. The display stage latency is capture-to-display."""
+        try:
+            frame_id, captured, frame, detections = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if frame_id < self.last_frame_id:
+            self.results_stats.drop()  # A slower worker finished an older frame, never show it
+            return None
+        self.last_frame_id = frame_id
+        self.results_stats.record(captured)
+        return frame, detections
+
+    def stats(self):
+        return [self.capture.stats, self.recognition_stats, self.results_stats, self.uploader,
+                *(worker.scheduler for worker in self.workers)]
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in [self.capture, *self.workers]:
+            thread.join(timeout=1)
+        self.uploader.stop()  # Last flush; anything unsent stays in the outbox
@@ -0,0 +1,272 @@
+"""
+Face recognition for the attendance kiosk on a compact embedding gallery.
+
+add_faces.py appends the raw enrolment crops to the memory-mapped FaceStore (data/gallery/,
+one flattened 50x50x3 crop per row). From them a PCA embedder is fitted and every student is
+reduced to a few unit-length centroids in the embedding space, saved to data/face_gallery.npz.
+The kiosk only loads that file: matching a frame is one (faces x dims) @ (dims x centroids)
+product, which grows with the number of students, not with the number of stored samples.
+
+add_faces.py updates the centroids of the enrolled student with the current PCA basis.
+Faces whose best similarity is below MATCH_THRESHOLD, or that are nearly as close to a
+second student (MIN_MARGIN), are rejected as UNKNOWN by predict_with_confidence.
+
+Refit the basis and every centroid (e.g. after many enrolments), drop a student, or print
+the genuine / impostor similarity distribution to tune MATCH_THRESHOLD:
+    python recognition.py
+    python recognition.py remove <StudentID>
+    python recognition.py calibrate
+"""
+
+import os
+import sys
+import cv2
+import numpy as np
+from gallery_store import FaceStore
+
+FACE_SIZE = (50, 50)
+EMBEDDING_DIMS = 64
+CENTROIDS_PER_STUDENT = 3
+PCA_FIT_SAMPLES = 5000  # Rows used to fit the PCA basis, so fitting cost stays flat as the school grows
+EMBED_CHUNK = 4096
+MATCH_THRESHOLD = 0.6  # Minimum cosine similarity to the best centroid
+MIN_MARGIN = 0.05  # Minimum lead over the best centroid of any other student
+UNKNOWN = 'Unknown'
+
+LEGACY_FACES_PATH = 'data/faces_data.pkl'
+LEGACY_NAMES_PATH = 'data/names.pkl'
+GALLERY_PATH = 'data/face_gallery.npz'
+
+
+def normalise(vectors):
+    """Scale raw pixel rows to [0, 1] and L2-normalise them (float32)."""
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1) / 255.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def unit_rows(vectors):
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-6)
+
+
+def top_components(centred, dims, seed=0, oversample=10, power_iterations=2):
+    """Leading principal axes by randomized SVD: only a (samples x dims) sketch is decomposed."""
+    sketch = centred @ np.random.default_rng(seed).standard_normal(
+        (centred.shape[1], dims + oversample), dtype=np.float32)
+    for _ in range(power_iterations):
+        sketch, _ = np.linalg.qr(sketch)
+        sketch = centred @ (centred.T @ sketch)
+    basis, _ = np.linalg.qr(sketch)
+    _, _, vt = np.linalg.svd(basis.T @ centred, full_matrices=False)
+    return vt[:dims]
+
+
+class FaceEmbedder:
+    """PCA projection of normalised crops to EMBEDDING_DIMS unit vectors."""
+
+    def __init__(self, mean, components):
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)
+
+    @classmethod
+    def fit(cls, faces, rows=None, dims=EMBEDDING_DIMS, max_samples=PCA_FIT_SAMPLES, seed=0):
+        rows = np.arange(len(faces)) if rows is None else rows
+        if len(rows) > max_samples:
+            rows = np.sort(np.random.default_rng(seed).choice(rows, max_samples, replace=False))
+        sample = normalise(faces[rows])
+        mean = sample.mean(axis=0)
+        return cls(mean, top_components(sample - mean, dims, seed))
+
+    def embed(self, faces, rows=None):
+        """
+        (n, dims) unit embeddings of flattened crops (or of faces[rows]), computed in chunks
+        so that a memory-mapped store is never read into RAM at once.
+        """
+        rows = np.arange(len(faces)) if rows is None else rows
+        out = np.empty((len(rows), len(self.components)), dtype=np.float32)
+        for start in range(0, len(rows), EMBED_CHUNK):
+            chunk = normalise(faces[rows[start:start + EMBED_CHUNK]])
+            out[start:start + len(chunk)] = (chunk - self.mean) @ self.components.T
+        return unit_rows(out)
+
+
+def student_centroids(embeddings, k=CENTROIDS_PER_STUDENT, iterations=10):
+    """A few spherical k-means centroids of one student's embeddings (covers pose / lighting spread)."""
+    k = min(k, len(embeddings))
+    centroids = embeddings[np.linspace(0, len(embeddings) - 1, k).astype(int)]
+    for _ in range(iterations):
+        assignment = (embeddings @ centroids.T).argmax(axis=1)
+        for c in range(k):
+            members = embeddings[assignment == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = unit_rows(centroids)
+    return centroids
+
+
+class FaceGallery:
+    """
+    Per-student embedding centroids and the embedder that produced them.
+    For unit vectors |a - b|^2 = 2 - 2 a.b, so the closest centroid is the highest dot product.
+    """
+
+    def __init__(self, embedder, centroids, labels):
+        self.embedder = embedder
+        self.centroids = centroids.astype(np.float32)
+        self.labels = np.asarray(labels)
+
+    @classmethod
+    def build(cls, faces, labels, rows=None, dims=EMBEDDING_DIMS, k=CENTROIDS_PER_STUDENT):
+        """Fit the embedder and the centroids on faces (or on faces[rows], labels aligned with rows)."""
+        labels = np.asarray(labels)
+        embedder = FaceEmbedder.fit(faces, rows, dims)
+        embeddings = embedder.embed(faces, rows)
+        centroids, centroid_labels = [], []
+        for student in np.unique(labels):
+            student_rows = student_centroids(embeddings[labels == student], k)
+            centroids.append(student_rows)
+            centroid_labels += [student] * len(student_rows)
+        return cls(embedder, np.concatenate(centroids), centroid_labels)
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        rows, labels = store.index()
+        return cls.build(store.faces(), labels, rows, **kwargs)
+
+    def save(self, path=GALLERY_PATH):
+        np.savez(path, mean=self.embedder.mean, components=self.embedder.components,
+                 centroids=self.centroids, labels=self.labels)
+
+    @classmethod
+    def load(cls, path=GALLERY_PATH):
+        with np.load(path) as data:
+            return cls(FaceEmbedder(data['mean'], data['components']), data['centroids'], data['labels'])
+
+    @property
+    def students(self):
+        return len(np.unique(self.labels))
+
+    def remove_student(self, label):
+        keep = self.labels != str(label)
+        self.centroids, self.labels = self.centroids[keep], self.labels[keep]
+
+    def update_student(self, label, faces, k=CENTROIDS_PER_STUDENT):
+        """Replace the centroids of one student, embedded with the current basis (O(their samples))."""
+        self.remove_student(label)
+        centroids = student_centroids(self.embedder.embed(faces), k)
+        self.centroids = np.concatenate([self.centroids, centroids])
+        self.labels = np.concatenate([self.labels.astype(str), np.full(len(centroids), str(label))])
+
+    def match(self, queries):
+        """(best centroid index, cosine similarity) of every query row."""
+        similarity = self.embedder.embed(queries) @ self.centroids.T
+        best = similarity.argmax(axis=1)
+        return best, similarity[np.arange(len(best)), best]
+
+    def predict(self, queries):
+        """Label of the closest centroid for a batch of flattened crops (one row per face)."""
+        if len(queries) == 0:
+            return np.empty(0, dtype=self.labels.dtype)
+        best, _ = self.match(queries)
+        return self.labels[best]
+
+    def predict_with_confidence(self, queries, threshold=MATCH_THRESHOLD, min_margin=MIN_MARGIN):
+        """
+        (labels, similarities, margins) for a batch of crops. The margin is the lead of the best
+        student over the runner-up student; a face below threshold or min_margin is labelled UNKNOWN.
+        """
+        if len(queries) == 0:
+            return np.empty(0, dtype=object), np.empty(0, np.float32), np.empty(0, np.float32)
+        similarity = self.embedder.embed(queries) @ self.centroids.T
+        best = similarity.argmax(axis=1)
+        rows = np.arange(len(best))
+        best_similarity = similarity[rows, best]
+        other_students = self.labels[None, :] != self.labels[best][:, None]
+        runner_up = np.where(other_students, similarity, -np.inf).max(axis=1, initial=-1.0)
+        margin = best_similarity - runner_up
+        labels = self.labels[best].astype(object)
+        labels[(best_similarity < threshold) | (margin < min_margin)] = UNKNOWN
+        return labels, best_similarity, margin
+
+
+def open_store():
+    store = FaceStore()
+    if not store.manifest['rows'] and os.path.exists(LEGACY_FACES_PATH):
+        store.import_pickles(LEGACY_FACES_PATH, LEGACY_NAMES_PATH)  # One-off migration of the pickled gallery
+    return store
+
+
+def build_gallery(store=None, gallery_path=GALLERY_PATH):
+    store = store or open_store()
+    gallery = FaceGallery.from_store(store)
+    gallery.save(gallery_path)
+    return gallery
+
+
+def enrol_student(label, faces, store=None, gallery_path=GALLERY_PATH, replace=False):
+    """Store new crops of a student and refresh only their centroids (full refit if there is no gallery yet)."""
+    store = store or open_store()
+    if replace:
+        store.replace(label, faces)
+    else:
+        store.append(label, faces)
+    if not os.path.exists(gallery_path):
+        return build_gallery(store, gallery_path)
+    gallery = FaceGallery.load(gallery_path)
+    gallery.update_student(label, store.faces_of(label))
+    gallery.save(gallery_path)
+    return gallery
+
+
+def remove_student(label, store=None, gallery_path=GALLERY_PATH):
+    store = store or open_store()
+    removed = store.remove(label)
+    if removed and os.path.exists(gallery_path):
+        gallery = FaceGallery.load(gallery_path)
+        gallery.remove_student(label)
+        gallery.save(gallery_path)
+    return removed
+
+
+def crop_faces(frame, boxes, size=FACE_SIZE):
+    """Resize every detected face of a frame into one (faces, 50*50*3) batch."""
+    crops = [cv2.resize(frame[y:y + h, x:x + w, :], size) for (x, y, w, h) in boxes]
+    if not crops:
+        return np.empty((0, size[0] * size[1] * frame.shape[2]), dtype=frame.dtype)
+    return np.asarray(crops).reshape(len(crops), -1)
+
+
+def calibrate(gallery, store, samples_per_student=20, seed=0):
+    """Best similarity of enrolled samples to their own student (genuine) and to anyone else (impostor)."""
+    rng = np.random.default_rng(seed)
+    faces = store.faces()
+    genuine, impostor = [], []
+    for label in store.students:
+        rows = store.rows_of(label)
+        rows = np.sort(rng.choice(rows, min(samples_per_student, len(rows)), replace=False))
+        similarity = gallery.embedder.embed(faces, rows) @ gallery.centroids.T
+        own = gallery.labels == label
+        genuine += similarity[:, own].max(axis=1).tolist()
+        if (~own).any():
+            impostor += similarity[:, ~own].max(axis=1).tolist()
+    return np.array(genuine), np.array(impostor)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['calibrate']:
+        genuine, impostor = calibrate(FaceGallery.load(GALLERY_PATH), open_store())
+        percentiles = [1, 5, 50, 95, 99]
+        print("percentile " + " ".join(f"{p:>6}" for p in percentiles))
+        for name, values in (("genuine", genuine), ("impostor", impostor)):
+            if len(values):
+                print(f"{name:<10} " + " ".join(f"{v:>6.3f}" for v in np.percentile(values, percentiles)))
+        for threshold in (0.4, 0.5, 0.6, 0.7, 0.8):
+            print(f"threshold {threshold:.1f}: rejects {np.mean(genuine < threshold):.1%} of genuine, "
+                  f"accepts {np.mean(impostor >= threshold) if len(impostor) else 0:.1%} of impostor matches")
+        sys.exit()
+    if sys.argv[1:2] == ['remove']:
+        print("Removed" if remove_student(sys.argv[2]) else "Not enrolled", sys.argv[2])
+        sys.exit()
+    gallery = build_gallery()
+    print(f"Gallery: {gallery.students} students, {len(gallery.centroids)} centroids "
+          f"x {gallery.centroids.shape[1]} dims -> {GALLERY_PATH}")
@@ -1,91 +1,98 @@
+import os
 import cv2
-import pickle
-import requests
+import time
 from datetime import datetime
-from sklearn.neighbors import KNeighborsClassifier
+from recognition import FaceGallery, GALLERY_PATH, UNKNOWN, build_gallery
+from pipeline import KioskPipeline
+from uploader import AttendanceUploader
 
-video = cv2.VideoCapture(0)
-facedetect = cv2.CascadeClassifier('data/haarcascade_frontalface_default.xml')
-
-with open('data/names.pkl', 'rb') as w:
-    LABELS = pickle.load(w)
-with open('data/faces_data.pkl', 'rb') as f:
-    FACES = pickle.load(f)
-
-print('Shape of Faces matrix --> ', FACES.shape)
-
-knn = KNeighborsClassifier(n_neighbors=5)
-knn.fit(FACES, LABELS)
+# Compact embedding gallery (per-student centroids); every frame is matched in one batched call
+gallery = FaceGallery.load(GALLERY_PATH) if os.path.exists(GALLERY_PATH) else build_gallery()
+print(f'Gallery --> {gallery.students} students, centroids {gallery.centroids.shape}')
 
 COL_NAMES = ['StudentID', 'Date', 'Status']
-API_URL = "http://127.0.0.1:8000/attendance/"
-
-def send_attendance(attendance_list):
-    try:
-        response = requests.post(API_URL, json=attendance_list)
-        if response.status_code in [200, 201]:
-            print(f"Attendance submitted: {attendance_list}")
-        else:
-            print(f"Failed to submit attendance: {response.status_code}, Response: {response.text}")
-    except Exception as e:
-        print(f"Error sending request: {e}")
+API_URL = "http://127.0.0.1:8000/attendance/upsert/"  # Idempotent, re-sending a day is safe
+RECOGNITION_WORKERS = 1  # Tracking follows consecutive frames, one worker keeps them in order
+DETECTION = {'detect_every': 5, 'scale': 0.5}  # See detection.py; {'detect_every': 1, 'scale': 1.0} = every frame
+DETECTION.update(threshold=0.6, min_votes=3)  # Rejection threshold / agreeing votes, tune with `recognition.py calibrate`
 
 attendance_records = {}
+overlay_lines = []  # (text, text_width) of the attendance list, rebuilt only when a student is added
+
+def build_overlay(records):
+    lines = []
+    for student_id, (date, status) in records.items():
+        text = f"{student_id} - {date} - {'Present' if status == 1 else 'Absent'}"
+        (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_COMPLEX, 1, 2)
+        lines.append((text, text_width))
+    return lines
+
+# Capture, recognition and upload run on their own threads; this loop only draws the newest result
+video = cv2.VideoCapture(0)
+uploader = AttendanceUploader(API_URL)  # Durable outbox, flushed in the background every few seconds
+pipeline = KioskPipeline(video, 'data/haarcascade_frontalface_default.xml', gallery, uploader,
+                         workers=RECOGNITION_WORKERS, detection=DETECTION).start()
+last_stats_print = time.perf_counter()
 
 while True:
-    ret, frame = video.read()
-    if not ret or frame is None:
-        continue  # Skip processing if frame capture fails
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = facedetect.detectMultiScale(gray, 1.3, 5)
-    
-    today = datetime.now().strftime("%Y-%m-%d")
-    detected_students = set()
-
-    for (x, y, w, h) in faces:
-        crop_img = frame[y:y+h, x:x+w, :]
-        resized_img = cv2.resize(crop_img, (50, 50)).flatten().reshape(1, -1)
-        student_id = str(knn.predict(resized_img)[0])
-        detected_students.add(student_id)
-
-        if student_id not in attendance_records:
+    latest = pipeline.latest()
+    if latest is not None:
+        frame, detections = latest
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        # Only tracks confirmed over several recognition votes are committed as attendance
+        new_students = [sid for _, sid, _, confirmed in detections if confirmed and sid not in attendance_records]
+        for student_id in new_students:
             attendance_records[student_id] = (today, 1)
+        if new_students:
+            overlay_lines = build_overlay(attendance_records)
+            uploader.enqueue([{"StudentID": sid, "Date": today, "Status": 1} for sid in new_students])
 
-        # Draw bounding box
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        for (x, y, w, h), student_id, confidence, confirmed in detections:
+            # Green once confirmed, yellow while votes are still coming in, red for unknown faces
+            color = (0, 255, 0) if confirmed else (0, 0, 255) if student_id == UNKNOWN else (0, 255, 255)
 
-        # Draw dark grey background for text
-        cv2.rectangle(frame, (x, y - 50), (x + w, y), (50, 50, 50), -1)
+            # Draw bounding box
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
 
-        # Display student ID with increased font size
-        cv2.putText(frame, student_id, (x, y - 15), cv2.FONT_HERSHEY_COMPLEX, 1.2, (0, 255, 0), 2)
+            # Draw dark grey background for text
+            cv2.rectangle(frame, (x, y - 50), (x + w, y), (50, 50, 50), -1)
 
-    # Display attendance records on screen
-    y_offset = 50
-    for student_id, (date, status) in attendance_records.items():
-        text = f"{student_id} - {date} - {'Present' if status == 1 else 'Absent'}"
+            # Display student ID (and vote ratio until confirmed) with increased font size
+            label = student_id if confirmed or student_id == UNKNOWN else f"{student_id}? {confidence:.0%}"
+            cv2.putText(frame, label, (x, y - 15), cv2.FONT_HERSHEY_COMPLEX, 1.2, color, 2)
 
-        # Background for text (dark grey)
-        (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_COMPLEX, 1, 2)
-        cv2.rectangle(frame, (10, y_offset - 30), (10 + text_width + 10, y_offset + 5), (50, 50, 50), -1)
+        # Display attendance records on screen
+        y_offset = 50
+        for text, text_width in overlay_lines:
+            # Background for text (dark grey)
+            cv2.rectangle(frame, (10, y_offset - 30), (10 + text_width + 10, y_offset + 5), (50, 50, 50), -1)
+
+            # Display text in green
+            cv2.putText(frame, text, (20, y_offset), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 2)
+            y_offset += 40  # Increase spacing
+
+        # Per-stage throughput / latency
+        for line, stats in enumerate(pipeline.stats()):
+            cv2.putText(frame, str(stats), (10, frame.shape[0] - 15 - 20 * line),
+                        cv2.FONT_HERSHEY_COMPLEX, 0.5, (0, 255, 255), 1)
 
-        # Display text in green
-        cv2.putText(frame, text, (20, y_offset), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 2)
-        y_offset += 40  # Increase spacing
+        cv2.imshow("Attendance System", frame)
 
-    cv2.imshow("Attendance System", frame)
+    if time.perf_counter() - last_stats_print > 10:
+        print(" | ".join(str(stats) for stats in pipeline.stats()))
+        last_stats_print = time.perf_counter()
 
     key = cv2.waitKey(1) & 0xFF
 
     if key == ord('o'):
-        if attendance_records:
-            attendance_list = [{"StudentID": sid, "Date": date, "Status": status} for sid, (date, status) in attendance_records.items()]
-            send_attendance(attendance_list)
-            attendance_records.clear()
+        uploader.flush_soon()  # Records are already in the outbox, just send them now
+        attendance_records.clear()
+        overlay_lines = []
 
     if key == ord('q'):
         break
 
+pipeline.stop()
 video.release()
 cv2.destroyAllWindows()
@@ -0,0 +1,207 @@
+"""
+Durable, batched attendance uploader of the kiosk.
+
+Recognised students are written to a local SQLite outbox (data/outbox.sqlite3) first and are
+only deleted from it once /attendance/upsert/ has acknowledged them, so a server or network
+outage never loses records. A background thread flushes the outbox in batches over one pooled
+requests.Session, backing off exponentially (with jitter) while the server is unreachable.
+
+Duplicates are impossible by construction: the outbox is keyed on (StudentID, Date), the same
+natural key /attendance/upsert/ merges on, so resending a batch whose response was lost only
+reports its rows as unchanged.
+Rows the server rejects (e.g. an unknown StudentID) are kept as 'failed' for inspection:
+    python uploader.py            # pending / failed rows
+    python uploader.py flush      # one synchronous flush
+"""
+
+import sys
+import json
+import time
+import random
+import sqlite3
+import threading
+import requests
+from contextlib import closing, contextmanager
+from requests.adapters import HTTPAdapter
+from pipeline import StageStats
+
+API_URL = "http://127.0.0.1:8000/attendance/upsert/"
+OUTBOX_PATH = 'data/outbox.sqlite3'
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 5  # Seconds between background flushes
+REQUEST_TIMEOUT = 10
+BACKOFF_BASE = 1
+BACKOFF_MAX = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    StudentID TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    Status INTEGER NOT NULL,
+    Version INTEGER NOT NULL DEFAULT 1,
+    State TEXT NOT NULL DEFAULT 'pending',
+    Attempts INTEGER NOT NULL DEFAULT 0,
+    NextAttemptAt REAL NOT NULL DEFAULT 0,
+    Error TEXT,
+    PRIMARY KEY (StudentID, Date)
+)
+"""
+
+
+class AttendanceOutbox:
+    """
+    SQLite queue of attendance rows waiting for the server. Safe to use from several threads.
+    The pending / failed row counts are kept in memory (`pending`, `failed`), so showing them
+    never touches the disk; they are read from the file once, when the outbox is opened.
+    """
+
+    def __init__(self, path=OUTBOX_PATH):
+        self.path = path
+        self.lock = threading.Lock()  # Serialises the writes with their counter updates
+        with self.connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(SCHEMA)
+        counts = self.counts()
+        self.pending, self.failed = counts.get('pending', 0), counts.get('failed', 0)
+
+    @contextmanager
+    def connect(self):
+        """A connection committed on success and always closed."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as db, db:
+            yield db
+
+    def enqueue(self, records):
+        """Queue {StudentID, Date, Status} rows; a changed Status re-queues the row with a new Version."""
+        with self.lock, self.connect() as db:
+            added = retried = 0
+            for record in records:
+                previous = db.execute("SELECT Status, State FROM outbox WHERE StudentID = ? AND Date = ?",
+                                      (record['StudentID'], record['Date'])).fetchone()
+                db.execute("""
+                    INSERT INTO outbox (StudentID, Date, Status) VALUES (:StudentID, :Date, :Status)
+                    ON CONFLICT (StudentID, Date) DO UPDATE SET
+                        Status = excluded.Status, Version = Version + 1, State = 'pending',
+                        Attempts = 0, NextAttemptAt = 0, Error = NULL
+                    WHERE Status != excluded.Status OR State = 'failed'
+                """, record)
+                added += previous is None
+                retried += previous is not None and previous[1] == 'failed'
+        self.pending += added + retried
+        self.failed -= retried
+
+    def due(self, limit=BATCH_SIZE):
+        with self.connect() as db:
+            return db.execute("""
+                SELECT StudentID, Date, Status, Version FROM outbox
+                WHERE State = 'pending' AND NextAttemptAt <= ? ORDER BY Date, StudentID LIMIT ?
+            """, (time.time(), limit)).fetchall()
+
+    def acknowledge(self, rows):
+        """Delete sent rows, unless they were re-queued with another Status while in flight."""
+        with self.lock, self.connect() as db:
+            deleted = db.executemany("DELETE FROM outbox WHERE StudentID = ? AND Date = ? AND Version = ?",
+                                     [(student_id, date, version) for student_id, date, _, version in rows]).rowcount
+        self.pending -= deleted
+
+    def fail(self, rows, errors):
+        with self.lock, self.connect() as db:
+            failed = db.executemany("UPDATE outbox SET State = 'failed', Error = ? "
+                                    "WHERE StudentID = ? AND Date = ? AND Version = ? AND State = 'pending'",
+                                    [(json.dumps(error), row[0], row[1], row[3])
+                                     for row, error in zip(rows, errors)]).rowcount
+        self.pending -= failed
+        self.failed += failed
+
+    def postpone(self, rows):
+        """Exponential backoff with jitter, per row."""
+        with self.connect() as db:
+            for student_id, date, _, version in rows:
+                attempts = db.execute("SELECT Attempts FROM outbox WHERE StudentID = ? AND Date = ?",
+                                      (student_id, date)).fetchone()[0]
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempts) * random.uniform(0.5, 1.0)
+                db.execute("UPDATE outbox SET Attempts = Attempts + 1, NextAttemptAt = ? "
+                           "WHERE StudentID = ? AND Date = ? AND Version = ?",
+                           (time.time() + delay, student_id, date, version))
+
+    def counts(self):
+        """{State: rows} read from the file (the outbox CLI; the kiosk shows pending / failed)."""
+        with self.connect() as db:
+            return dict(db.execute("SELECT State, COUNT(*) FROM outbox GROUP BY State").fetchall())
+
+
+class AttendanceUploader(threading.Thread):
+    """Background flusher of an AttendanceOutbox; enqueue() never touches the network."""
+
+    def __init__(self, api_url=API_URL, outbox=None, interval=FLUSH_INTERVAL):
+        super().__init__(name='uploader', daemon=True)
+        self.api_url = api_url
+        self.outbox = outbox or AttendanceOutbox()
+        self.interval = interval
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.stats = StageStats('upload')
+
+    def enqueue(self, records):
+        self.outbox.enqueue(records)
+
+    def flush_soon(self):
+        self.wake.set()
+
+    def post(self, rows):
+        """Send one batch; returns False when the server is unreachable (retry later)."""
+        payload = [{'StudentID': student_id, 'Date': date, 'Status': status} for student_id, date, status, _ in rows]
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.api_url, params={'Partial': 'true'}, json=payload,
+                                         timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as error:
+            print(f"Attendance upload failed, will retry: {error}")
+            self.outbox.postpone(rows)
+            return False
+        if response.status_code >= 500 or response.status_code == 429:
+            print(f"Attendance upload failed, will retry: {response.status_code}")
+            self.outbox.postpone(rows)
+            return False
+
+        self.stats.record(started)
+        if response.status_code >= 400:  # The whole batch was rejected, retrying would not help
+            self.outbox.fail(rows, [response.text] * len(rows))
+            return True
+        result = response.json()
+        errors = {error['index']: error['errors'] for error in result.get('errors', [])}
+        self.outbox.fail([rows[index] for index in errors], list(errors.values()))
+        self.outbox.acknowledge([row for index, row in enumerate(rows) if index not in errors])
+        print(f"Attendance submitted: {result['inserted']} new, {result['updated']} updated, "
+              f"{result['unchanged']} unchanged, {len(errors)} rejected")
+        return True
+
+    def flush(self):
+        """Send every due row in batches; stops at the first unreachable-server error."""
+        while True:
+            rows = self.outbox.due()
+            if not rows or not self.post(rows):
+                return
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.flush()
+            self.wake.wait(self.interval)
+            self.wake.clear()
+        self.flush()  # Last attempt on exit, anything unsent stays in the outbox for the next start
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+        self.join()
+
+    def __str__(self):
+        return f"{self.stats} | outbox: {self.outbox.pending} pending, {self.outbox.failed} failed"
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['flush']:
+        AttendanceUploader().flush()
+    print(AttendanceOutbox().counts())
@@ -0,0 +1,186 @@
+"""
+Pre-computed embedding index of the endpoints in my_api_endpoints.csv.
+
+Every CSV row gets a content-hash ID (url, description, variables, isFrontend), so a build only
+embeds the rows that are new or changed - all of them in one batched call - and reuses the
+vectors of the others. The result is written as a versioned index:
+    vectorstore/endpoint_index/index.json         manifest: version, model, ids, documents, metadatas
+    vectorstore/endpoint_index/index-<version>.npy  unit-length float32 embeddings, memory-mapped at startup
+and the ChromaDB collection "api_endpoints" is synced with upserts of the changed rows and
+deletes of the removed ones (older random-ID rows included).
+
+Run it at build / deploy time, and after editing the CSV (the server also rebuilds a stale
+index on start, and when the CSV changes while it runs):
+    python endpoint_index.py [--csv my_api_endpoints.csv] [--store vectorstore] [--no-chroma]
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+import chromadb
+from chromadb.utils import embedding_functions
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # chromadb's DefaultEmbeddingFunction
+INDEX_FORMAT = 1
+CSV_PATH = "my_api_endpoints.csv"
+VECTOR_STORE_PATH = "vectorstore"
+INDEX_DIR = "endpoint_index"
+COLLECTION_NAME = "api_endpoints"
+
+embedding_function = embedding_functions.DefaultEmbeddingFunction()
+_build_lock = threading.Lock()
+
+
+def row_id(url, description, variables, is_frontend):
+    content = json.dumps([url, description, variables, is_frontend])
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def read_endpoints(csv_path=CSV_PATH):
+    """(ids, documents, metadatas) of the CSV rows, duplicates dropped."""
+    ids, documents, metadatas = [], [], []
+    for _, row in pd.read_csv(csv_path).iterrows():
+        metadata = {"url": str(row["url"]), "variables": str(row["variables"]), "isFrontend": bool(row["isFrontend"])}
+        identifier = row_id(metadata["url"], str(row["Description"]), metadata["variables"], metadata["isFrontend"])
+        if identifier in ids:
+            continue
+        ids.append(identifier)
+        documents.append(str(row["Description"]))
+        metadatas.append(metadata)
+    return ids, documents, metadatas
+
+
+def index_version(ids):
+    return hashlib.sha256(json.dumps([INDEX_FORMAT, EMBEDDING_MODEL, ids]).encode()).hexdigest()[:16]
+
+
+def unit_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class EndpointIndex:
+    def __init__(self, version, ids, documents, metadatas, embeddings):
+        self.version = version
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.embeddings = embeddings  # (rows, dims) unit vectors, usually a read-only memmap
+
+    @classmethod
+    def load(cls, store_path=VECTOR_STORE_PATH):
+        """The persisted index, or None when it was never built."""
+        directory = os.path.join(store_path, INDEX_DIR)
+        try:
+            with open(os.path.join(directory, "index.json")) as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest["format"] != INDEX_FORMAT or manifest["model"] != EMBEDDING_MODEL:
+                return None
+            embeddings = np.load(os.path.join(directory, f"index-{manifest['version']}.npy"), mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(manifest["version"], manifest["ids"], manifest["documents"], manifest["metadatas"], embeddings)
+
+    def save(self, store_path=VECTOR_STORE_PATH):
+        """Write the embeddings, then switch the manifest to them, then drop older versions."""
+        directory = os.path.join(store_path, INDEX_DIR)
+        os.makedirs(directory, exist_ok=True)
+        matrix_name = f"index-{self.version}.npy"
+        with open(os.path.join(directory, matrix_name + ".tmp"), "wb") as matrix_file:
+            np.save(matrix_file, np.asarray(self.embeddings, dtype=np.float32))
+        os.replace(os.path.join(directory, matrix_name + ".tmp"), os.path.join(directory, matrix_name))
+        manifest = {"format": INDEX_FORMAT, "model": EMBEDDING_MODEL, "version": self.version,
+                    "ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}
+        with open(os.path.join(directory, "index.json.tmp"), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+        os.replace(os.path.join(directory, "index.json.tmp"), os.path.join(directory, "index.json"))
+        for name in os.listdir(directory):
+            if name.startswith("index-") and name.endswith(".npy") and name != matrix_name:
+                os.remove(os.path.join(directory, name))
+
+    def search(self, query_embeddings, n_results=1):
+        """Cosine nearest endpoints, in the same shape as collection.query()."""
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if not len(self.ids):
+            for key in results:
+                results[key] = [[] for _ in query_embeddings]
+            return results
+        similarities = unit_rows(query_embeddings) @ np.asarray(self.embeddings).T
+        for row in similarities:
+            best = np.argsort(-row)[:n_results]
+            results["ids"].append([self.ids[i] for i in best])
+            results["documents"].append([self.documents[i] for i in best])
+            results["metadatas"].append([self.metadatas[i] for i in best])
+            results["distances"].append([float(1 - row[i]) for i in best])
+        return results
+
+
+def sync_collection(store_path, ids, documents, metadatas, embeddings):
+    """Bring the ChromaDB collection to exactly these rows; returns (upserted, deleted)."""
+    collection = chromadb.PersistentClient(store_path).get_or_create_collection(
+        name=COLLECTION_NAME, embedding_function=embedding_function
+    )
+    existing = set(collection.get(include=[])["ids"])
+    stale = sorted(existing - set(ids))
+    if stale:
+        collection.delete(ids=stale)
+    changed = [i for i, identifier in enumerate(ids) if identifier not in existing]
+    if changed:
+        collection.upsert(
+            ids=[ids[i] for i in changed],
+            embeddings=[embeddings[i].tolist() for i in changed],
+            documents=[documents[i] for i in changed],
+            metadatas=[metadatas[i] for i in changed],
+        )
+    return len(changed), len(stale)
+
+
+def build_index(csv_path=CSV_PATH, store_path=VECTOR_STORE_PATH, sync_chroma=True):
+    """(EndpointIndex, number of rows embedded), embedding only rows missing from the previous index."""
+    with _build_lock:
+        ids, documents, metadatas = read_endpoints(csv_path)
+        previous = EndpointIndex.load(store_path)
+        known = {identifier: row for row, identifier in enumerate(previous.ids)} if previous else {}
+
+        embeddings = np.zeros((len(ids), 0), dtype=np.float32)
+        missing = [i for i, identifier in enumerate(ids) if identifier not in known]
+        fresh = unit_rows(embedding_function([documents[i] for i in missing])) if missing else None
+        if ids:
+            dims = fresh.shape[1] if fresh is not None else previous.embeddings.shape[1]
+            embeddings = np.empty((len(ids), dims), dtype=np.float32)
+            for row, identifier in enumerate(ids):
+                if identifier in known:
+                    embeddings[row] = previous.embeddings[known[identifier]]
+            if missing:
+                embeddings[missing] = fresh
+
+        index = EndpointIndex(index_version(ids), ids, documents, metadatas, embeddings)
+        if previous is None or previous.version != index.version:
+            index.save(store_path)
+        if sync_chroma:
+            sync_collection(store_path, ids, documents, metadatas, embeddings)
+        return EndpointIndex.load(store_path), len(missing)
+
+
+def load_or_build(csv_path=CSV_PATH, store_path=VECTOR_STORE_PATH):
+    """The memory-mapped index, rebuilt first when the CSV no longer matches it."""
+    index = EndpointIndex.load(store_path)
+    if index is not None and index.version == index_version(read_endpoints(csv_path)[0]):
+        return index
+    print("Endpoint index missing or stale, building it (run endpoint_index.py at build time to skip this)")
+    return build_index(csv_path, store_path)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--store", default=VECTOR_STORE_PATH)
+    parser.add_argument("--no-chroma", action="store_true", help="only write the memory-mapped index")
+    args = parser.parse_args()
+    index, embedded = build_index(args.csv, args.store, sync_chroma=not args.no_chroma)
+    print(f"Endpoint index {index.version}: {len(index.ids)} endpoints, {embedded} embedded")
@@ -0,0 +1,219 @@
+"""
+Deterministic fast path for the endpoint variables of /api queries.
+
+Most assistant queries name their IDs plainly ("attendance of S003", "timetable of 7A",
+"Mathematics syllabus for 8B"). FastPathExtractor resolves such fields locally with regexes
+and dictionary matching against the live IDs / names served by the Django API (/catalog/), so
+the LLM is only asked for the fields it could not resolve. A field is left unresolved whenever
+the text is ambiguous (two different classrooms, no date, ...), never guessed.
+
+Names are matched through a dictionary of word n-grams built once per catalog load, so a
+query costs a few dict lookups per word however many names the school has. The catalog is
+reloaded in a background thread every CATALOG_TTL seconds; requests keep using the previous
+lists (DEFAULT_CATALOG until the first load) and never wait for the server.
+"""
+
+import os
+import re
+import time
+import threading
+import requests
+from datetime import date, timedelta
+
+SERVER_URL = os.getenv("SERVER_URL", "http://127.0.0.1:8000")
+CATALOG_TTL = 300  # Seconds before the ID lists are reloaded from the server
+
+# Used while the server cannot be reached (same closed lists as the LLM prompt)
+DEFAULT_CATALOG = {
+    'ClassroomID': {'7A': [], '7B': [], '8A': [], '8B': [], '9A': []},
+    'SubjectID': {'Mathematics': [], 'Science': [], 'Social': [], 'Physics': [], 'Chemistry': []},
+    'StudentID': {f'S{n:03}': [] for n in range(1, 11)},
+    'SyllabusID': {'7A_Mathematics': []},
+}
+
+PERSON_FIELDS = ('StudentID', 'TeacherID')  # Also matched on a unique first / last name
+SUBJECT_ALIASES = {'maths': 'Mathematics', 'math': 'Mathematics', 'social studies': 'Social', 'sst': 'Social'}
+RELATIVE_DATES = {'today': 0, 'yesterday': -1, 'tomorrow': 1}
+# Answers to these depend on the day they are asked (not all of them are resolved locally)
+RELATIVE_TIME = re.compile(r'\b(today|yesterday|tomorrow|tonight|now|currently|recent(ly)?|'
+                           r'(this|last|next|past) (day|days|week|weeks|month|months|year|term))\b', re.IGNORECASE)
+ISO_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+WORD = re.compile(r'\w+')
+# Spaced / dashed classrooms ("class 7 a", "grade 8-B") only after a cue word, and never
+# followed by "." or a letter, so "8 a.m." or "7 at" are not classrooms
+CLASSROOM = re.compile(r'\b(?:class|grade|section|std|standard)\s*(\d{1,2})\s*-?\s*([a-z])(?![.\w])', re.IGNORECASE)
+CLASSROOM_TOKEN = re.compile(r'\b\d{1,2}[a-z]\b(?!\.\w)', re.IGNORECASE)  # "7A", but not "8a.m."
+
+
+def load_catalog(server_url=SERVER_URL, timeout=10):
+    """{field: {ID: [names]}} from /catalog/ (one values_list query per model on the server)."""
+    response = requests.get(f"{server_url}/catalog/", timeout=timeout)
+    response.raise_for_status()
+    return {field: {str(identifier): list(names) for identifier, names in entries.items()}
+            for field, entries in response.json().items()}
+
+
+def is_time_relative(text):
+    return RELATIVE_TIME.search(text) is not None
+
+
+class FastPathStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0  # Queries whose endpoint has variables
+        self.fast_path = 0  # ... fully resolved without the LLM
+        self.llm_calls = 0
+        self.fields_local = 0
+        self.fields_llm = 0
+
+    def record(self, resolved, unresolved):
+        with self.lock:
+            self.queries += 1
+            self.fast_path += not unresolved
+            self.llm_calls += bool(unresolved)
+            self.fields_local += len(resolved)
+            self.fields_llm += len(unresolved)
+
+    def snapshot(self):
+        with self.lock:
+            fields = self.fields_local + self.fields_llm
+            return {
+                'queries': self.queries,
+                'fast_path_hits': self.fast_path,
+                'llm_calls': self.llm_calls,
+                'hit_rate': self.fast_path / self.queries if self.queries else 0.0,
+                'field_hit_rate': self.fields_local / fields if fields else 0.0,
+            }
+
+
+class FastPathExtractor:
+    def __init__(self, server_url=SERVER_URL, ttl=CATALOG_TTL, catalog=None):
+        self.server_url = server_url
+        self.ttl = ttl
+        self.reloading = threading.Lock()  # Held by the background reload, at most one at a time
+        self.catalog = catalog
+        self.loaded_at = time.monotonic() if catalog is not None else float('-inf')
+        self.indexes = self._build_indexes(catalog if catalog is not None else DEFAULT_CATALOG)
+        self.stats = FastPathStats()
+        if catalog is None:
+            self._refresh()  # First load of the live lists, in the background
+
+    def _refresh(self):
+        """Start a background reload once the lists are older than ttl; never waits for it."""
+        if time.monotonic() - self.loaded_at < self.ttl or not self.reloading.acquire(blocking=False):
+            return
+        threading.Thread(target=self._reload, name='fast-path-catalog', daemon=True).start()
+
+    def _reload(self):
+        try:
+            catalog = load_catalog(self.server_url)
+            self.indexes = self._build_indexes(catalog)  # Swapped whole, requests see the old or the new one
+            self.catalog = catalog
+        except (requests.RequestException, ValueError, KeyError, AttributeError) as error:
+            print(f"Fast-path catalog not reloaded, keeping the previous lists: {error}")  # Retried after ttl
+        finally:
+            self.loaded_at = time.monotonic()
+            self.reloading.release()
+
+    @staticmethod
+    def _build_indexes(catalog):
+        """{field: (IDs by lower-case ID, {name words: ID}, n-gram lengths present)}"""
+        indexes = {}
+        for field, entries in catalog.items():
+            ids = {identifier.lower(): identifier for identifier in entries}
+            phrases = {}
+            for identifier, names in entries.items():
+                for name in names:
+                    words = tuple(WORD.findall(str(name).lower()))
+                    if words:
+                        phrases.setdefault(words, set()).add(identifier)
+                    if field in PERSON_FIELDS:
+                        for part in words:
+                            if len(part) >= 3:
+                                phrases.setdefault((part,), set()).add(identifier)
+            if field == 'SubjectID':
+                for alias, subject in SUBJECT_ALIASES.items():
+                    if subject in entries:
+                        phrases.setdefault(tuple(alias.split()), set()).add(subject)
+            unique = {words: matches.pop() for words, matches in phrases.items() if len(matches) == 1}
+            indexes[field] = (ids, unique, sorted({len(words) for words in unique}))
+        return indexes
+
+    @staticmethod
+    def _classroom_tokens(text):
+        """Every classroom-shaped mention ("7A", "class 7 a" -> "7a"), in the catalog or not."""
+        lowered = text.lower()
+        return set(CLASSROOM_TOKEN.findall(lowered)) | {grade + section for grade, section in CLASSROOM.findall(lowered)}
+
+    def _match(self, field, text):
+        """Every catalog ID of field mentioned in text, by ID or by name."""
+        ids, phrases, lengths = self.indexes.get(field, ({}, {}, []))
+        lowered = text.lower()
+        if field == 'ClassroomID':
+            tokens = self._classroom_tokens(lowered)
+        else:
+            tokens = re.findall(r'[\w-]+', lowered)
+        found = {ids[token] for token in tokens if token in ids}
+        words = WORD.findall(lowered)
+        for length in lengths:
+            for start in range(len(words) - length + 1):
+                identifier = phrases.get(tuple(words[start:start + length]))
+                if identifier is not None:
+                    found.add(identifier)
+        return found
+
+    def _classroom(self, text):
+        """The one catalog classroom of text, or None when it names none or several (known or not)."""
+        tokens = self._classroom_tokens(text)
+        if len(tokens) != 1:
+            return None  # "10a and 9a" is two classrooms, even when only 9A is in the catalog
+        return self.indexes.get('ClassroomID', ({},))[0].get(tokens.pop())
+
+    @staticmethod
+    def _dates(text):
+        found = set(ISO_DATE.findall(text))
+        for word, offset in RELATIVE_DATES.items():
+            if re.search(rf'\b{word}\b', text, re.IGNORECASE):
+                found.add((date.today() + timedelta(days=offset)).isoformat())
+        return sorted(found)
+
+    def entities(self, text):
+        """Every ID and date mentioned in text, as a sorted tuple of (field, value)."""
+        self._refresh()
+        found = {(field, identifier) for field in self.indexes for identifier in self._match(field, text)}
+        # Classrooms missing from the catalog too, so "10a and 9a" and "9a" never share a signature
+        classroom_ids = self.indexes.get('ClassroomID', ({},))[0]
+        found |= {('ClassroomID', classroom_ids.get(token, token.upper())) for token in self._classroom_tokens(text)}
+        found |= {('Date', value) for value in self._dates(text)}
+        return tuple(sorted(found))
+
+    def extract(self, fields, text):
+        """({field: value} resolved locally, [fields left for the LLM])."""
+        self._refresh()
+        resolved = {}
+        for field in fields:
+            if field in ('StartDate', 'EndDate', 'ParticularDate'):
+                continue
+            if field == 'ClassroomID':
+                classroom = self._classroom(text)
+                if classroom is not None:
+                    resolved[field] = classroom
+                continue
+            matches = self._match(field, text)
+            if len(matches) == 1:
+                resolved[field] = matches.pop()
+
+        if 'SyllabusID' in fields and 'SyllabusID' not in resolved:
+            classroom, subjects = self._classroom(text), self._match('SubjectID', text)
+            if classroom is not None and len(subjects) == 1:
+                syllabus_id = f"{classroom}_{subjects.pop()}"
+                if syllabus_id.lower() in self.indexes.get('SyllabusID', ({},))[0]:
+                    resolved['SyllabusID'] = syllabus_id
+
+        dates = self._dates(text)
+        if 'ParticularDate' in fields and len(dates) == 1:
+            resolved['ParticularDate'] = dates[0]
+        if 'StartDate' in fields and 'EndDate' in fields and len(dates) == 2:
+            resolved['StartDate'], resolved['EndDate'] = dates
+
+        return resolved, [field for field in fields if field not in resolved]
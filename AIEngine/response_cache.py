@@ -0,0 +1,237 @@
+"""
+Two-level response cache of the assistant endpoints.
+
+  1. exact: the normalised text (case, punctuation and whitespace folded unless fold=False) -> response
+  2. semantic: the cached question whose embedding has the highest cosine similarity with the
+     new one, if it is above `similarity` and both questions mention the same entities
+     (`signature`, e.g. the classroom / student IDs and dates found by the fast path), so
+     "attendance of 7A" never answers "attendance of 7B".
+
+Entries expire after `ttl` seconds and the least recently used one is evicted beyond
+`max_entries`. With `path` set, entries are written through to a SQLite file and reloaded on
+start. `depends_on` files (my_api_endpoints.csv) are checked on every lookup: when one changes,
+the whole cache is dropped. Their content hash is also stored next to the persisted entries, so
+entries written before the files were edited (e.g. across a deploy) are dropped on load.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+CACHE_TTL = int(os.getenv("CACHE_TTL", 3600))
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", 1000))
+CACHE_SIMILARITY = float(os.getenv("CACHE_SIMILARITY", 0.95))
+CACHE_PATH = os.getenv("CACHE_PATH")  # e.g. response_cache.sqlite3; memory only when unset
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    Name TEXT NOT NULL,
+    Key TEXT NOT NULL,
+    Value TEXT NOT NULL,
+    Embedding BLOB,
+    Signature TEXT,
+    ExpiresAt REAL NOT NULL,
+    PRIMARY KEY (Name, Key)
+);
+CREATE TABLE IF NOT EXISTS cache_sources (
+    Name TEXT PRIMARY KEY,
+    Hash TEXT NOT NULL
+);
+"""
+
+
+def normalise(text):
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s-]', ' ', str(text).lower())).strip()
+
+
+def cache_key(text, fold=True):
+    return hashlib.sha256((normalise(text) if fold else str(text)).encode()).hexdigest()
+
+
+def content_hash(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(path, 'rb') as source:
+                digest.update(hashlib.sha256(source.read()).digest())
+        except OSError:
+            digest.update(b'missing')
+    return digest.hexdigest()
+
+
+def file_fingerprint(paths):
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+class CacheEntry:
+    def __init__(self, value, expires_at, embedding=None, signature=None):
+        self.value = value
+        self.expires_at = expires_at
+        self.embedding = embedding
+        self.signature = signature
+
+
+class ResponseCache:
+    def __init__(self, name, max_entries=CACHE_SIZE, ttl=CACHE_TTL, similarity=CACHE_SIMILARITY,
+                 path=CACHE_PATH, depends_on=(), fold=True):
+        self.name = name
+        self.fold = fold  # False: exact text only (data payloads, where punctuation matters)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.path = path
+        self.depends_on = list(depends_on)
+        self.fingerprint = file_fingerprint(self.depends_on)
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()  # key -> CacheEntry, least recently used first
+        self.counters = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0, 'evictions': 0,
+                         'expirations': 0, 'invalidations': 0}
+        if self.path:
+            with self.connect() as db:
+                db.executescript(SCHEMA)
+            self._load()
+
+    @contextmanager
+    def connect(self):
+        """A connection committed on success and always closed."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as db, db:
+            yield db
+
+    def _load(self):
+        now = time.time()
+        sources = content_hash(self.depends_on)
+        with self.connect() as db:
+            stored = db.execute("SELECT Hash FROM cache_sources WHERE Name = ?", (self.name,)).fetchone()
+            if stored is None or stored[0] != sources:  # Written against other versions of depends_on
+                db.execute("DELETE FROM cache WHERE Name = ?", (self.name,))
+                db.execute("INSERT OR REPLACE INTO cache_sources VALUES (?, ?)", (self.name, sources))
+            db.execute("DELETE FROM cache WHERE Name = ? AND ExpiresAt <= ?", (self.name, now))
+            rows = db.execute("SELECT Key, Value, Embedding, Signature, ExpiresAt FROM cache WHERE Name = ? "
+                              "ORDER BY ExpiresAt", (self.name,)).fetchall()
+        for key, value, embedding, signature, expires_at in rows[-self.max_entries:]:
+            embedding = np.frombuffer(embedding, dtype=np.float32) if embedding is not None else None
+            self.entries[key] = CacheEntry(json.loads(value), expires_at, embedding, signature)
+
+    def _store(self, key, entry):
+        if not self.path:
+            return
+        embedding = entry.embedding.tobytes() if entry.embedding is not None else None
+        with self.connect() as db:
+            db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                       (self.name, key, json.dumps(entry.value), embedding, entry.signature, entry.expires_at))
+
+    def _forget(self, keys):
+        if self.path and keys:
+            with self.connect() as db:
+                db.executemany("DELETE FROM cache WHERE Name = ? AND Key = ?", [(self.name, key) for key in keys])
+
+    def _check_sources(self):
+        """Drop everything when one of the depends_on files changed."""
+        fingerprint = file_fingerprint(self.depends_on)
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.clear()
+            self.counters['invalidations'] += 1
+
+    def _expire(self, now):
+        expired = [key for key, entry in self.entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self.entries[key]
+        self.counters['expirations'] += len(expired)
+        self._forget(expired)
+
+    def get_exact(self, text):
+        """First level only; a miss is not counted yet (get_similar or lookup does)."""
+        with self.lock:
+            self._check_sources()
+            now = time.time()
+            key = cache_key(text, self.fold)
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self.entries.move_to_end(key)
+                self.counters['exact_hits'] += 1
+                return entry.value
+            self._expire(now)
+            return None
+
+    def get_similar(self, embedding, signature=None):
+        """Second level, for a question that missed get_exact()."""
+        if signature is not None:
+            signature = str(signature)
+        with self.lock:
+            candidates = [(key, entry) for key, entry in self.entries.items()
+                          if entry.embedding is not None and entry.signature == signature]
+            if candidates and self.similarity is not None and embedding is not None:
+                query = np.asarray(embedding, dtype=np.float32)
+                query = query / (np.linalg.norm(query) or 1.0)
+                similarities = np.stack([entry.embedding for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity:
+                    key, entry = candidates[best]
+                    self.entries.move_to_end(key)
+                    self.counters['semantic_hits'] += 1
+                    return entry.value
+            self.counters['misses'] += 1
+            return None
+
+    def lookup(self, text, embed=None, signature=None):
+        """
+        (cached value or None, embedding of text or None). embed (text -> vector) is only called
+        on an exact miss, and its result is returned so the caller can reuse it for the vector
+        store query and put().
+        """
+        value = self.get_exact(text)
+        if value is not None:
+            return value, None
+        embedding = None
+        if embed is not None and self.similarity is not None:
+            embedding = np.asarray(embed(text), dtype=np.float32)  # Outside the lock, may be slow
+        return self.get_similar(embedding, signature), embedding
+
+    def put(self, text, value, embedding=None, signature=None):
+        if signature is not None:
+            signature = str(signature)
+        with self.lock:
+            self._check_sources()
+            if embedding is not None:
+                embedding = np.asarray(embedding, dtype=np.float32)
+                embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+            key = cache_key(text, self.fold)
+            entry = CacheEntry(value, time.time() + self.ttl, embedding, signature)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self._store(key, entry)
+            evicted = []
+            while len(self.entries) > self.max_entries:
+                evicted.append(self.entries.popitem(last=False)[0])
+            self.counters['evictions'] += len(evicted)
+            self._forget(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.path:
+                with self.connect() as db:
+                    db.execute("DELETE FROM cache WHERE Name = ?", (self.name,))
+                    db.execute("INSERT OR REPLACE INTO cache_sources VALUES (?, ?)",
+                               (self.name, content_hash(self.depends_on)))
+
+    def stats(self):
+        with self.lock:
+            hits = self.counters['exact_hits'] + self.counters['semantic_hits']
+            lookups = hits + self.counters['misses']
+            return {**self.counters, 'size': len(self.entries), 'hit_rate': hits / lookups if lookups else 0.0}
@@ -0,0 +1,91 @@
+"""
+Tests of the deterministic fast path (no server, no LLM):
+    python -m unittest test_fast_path      # from AIEngine/
+"""
+
+import time
+import threading
+import unittest
+from unittest import mock
+import fast_path
+from fast_path import FastPathExtractor
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Saanvi', 'Vihaan', 'Anaya', 'Arjun', 'Meera',
+               'Kabir', 'Riya', 'Aditya', 'Myra', 'Reyansh', 'Tara', 'Vivaan', 'Zara', 'Krish', 'Nisha']
+LAST_NAMES = ['Sharma', 'Verma', 'Iyer', 'Nair', 'Reddy', 'Gupta', 'Mehta', 'Rao', 'Das', 'Kapoor',
+              'Joshi', 'Bose', 'Pillai', 'Menon', 'Singh', 'Khan', 'Patel', 'Shah', 'Jain', 'Ghosh']
+
+
+def school_catalog():
+    """A school-sized catalog: about 9k matchable phrases."""
+    classrooms = [f'{grade}{section}' for grade in range(1, 13) for section in 'ABCD']
+    return {
+        'ClassroomID': {classroom: [] for classroom in classrooms},
+        'SubjectID': {subject: [] for subject in ['Mathematics', 'Science', 'Social', 'Physics', 'Chemistry']},
+        'StudentID': {f'S{n:04}': [f'{FIRST_NAMES[n % 20]} {LAST_NAMES[n // 20 % 20]} {n}'] for n in range(1500)},
+        'TeacherID': {f'T{n:03}': [f'Teacher {LAST_NAMES[n % 20]} {n}'] for n in range(80)},
+        'SyllabusID': {f'{classroom}_Mathematics': [] for classroom in classrooms},
+        'ChapterID': {f'CH{n:04}': [f'Chapter {n} on topic {n * 7}'] for n in range(600)},
+        'ModuleID': {f'M{n:04}': [f'Module {n} exercise set {n * 3}'] for n in range(2500)},
+        'ExamID': {f'E{n:03}': [f'Unit test {n}'] for n in range(300)},
+    }
+
+
+class FastPathTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.extractor = FastPathExtractor(catalog=school_catalog())
+
+    def test_ids_and_names(self):
+        resolved, unresolved = self.extractor.extract(['StudentID', 'ClassroomID'], 'attendance of s0042 in 7a')
+        self.assertEqual((resolved, unresolved), ({'StudentID': 'S0042', 'ClassroomID': '7A'}, []))
+        resolved, _ = self.extractor.extract(['ModuleID'], 'when will module 17 exercise set 51 be done?')
+        self.assertEqual(resolved, {'ModuleID': 'M0017'})
+        resolved, _ = self.extractor.extract(['SyllabusID'], 'maths syllabus of class 8 b')
+        self.assertEqual(resolved, {'SyllabusID': '8B_Mathematics'})
+
+    def test_times_are_not_classrooms(self):
+        for text in ['attendance for grade 7 at 8 a.m.', 'timetable at 8a.m. tomorrow', 'class 7 at noon']:
+            resolved, unresolved = self.extractor.extract(['ClassroomID'], text)
+            self.assertEqual((resolved, unresolved), ({}, ['ClassroomID']), text)
+
+    def test_two_classrooms_are_never_guessed(self):
+        # 13A is not in the catalog, the text still names two classrooms
+        for text in ['show 13a and 9a', 'compare class 13 a with 9A', 'show 7a and 9a']:
+            resolved, unresolved = self.extractor.extract(['ClassroomID', 'SyllabusID'], f'maths {text}')
+            self.assertEqual((resolved, unresolved), ({}, ['ClassroomID', 'SyllabusID']), text)
+        self.assertNotEqual(self.extractor.entities('show 13a and 9a'), self.extractor.entities('show 9a'))
+
+    def test_lookup_cost_does_not_grow_with_the_catalog(self):
+        texts = [f'attendance of {FIRST_NAMES[n % 20]} {LAST_NAMES[n // 20 % 20]} {n} this week' for n in range(200)]
+        started = time.perf_counter()
+        for n, text in enumerate(texts):
+            self.assertEqual(self.extractor.extract(['StudentID'], text)[0], {'StudentID': f'S{n:04}'})
+            self.extractor.entities(text)
+        per_query = (time.perf_counter() - started) / len(texts)
+        self.assertLess(per_query, 0.005)  # One regex search per phrase took ~100 ms here
+
+    def test_reload_never_blocks_a_request(self):
+        release = threading.Event()
+
+        def slow_catalog(server_url):
+            release.wait(5)
+            return {'ClassroomID': {'10C': []}}
+
+        extractor = FastPathExtractor(catalog=school_catalog(), ttl=0)
+        with mock.patch.object(fast_path, 'load_catalog', slow_catalog):
+            started = time.perf_counter()
+            resolved, _ = extractor.extract(['ClassroomID'], 'timetable of 7a')
+            self.assertLess(time.perf_counter() - started, 0.5)
+            self.assertEqual(resolved, {'ClassroomID': '7A'})  # Previous lists while the reload runs
+            release.set()
+            for _ in range(100):
+                if '10c' in extractor.indexes['ClassroomID'][0]:
+                    break
+                time.sleep(0.01)
+        extractor.ttl = 300
+        self.assertEqual(extractor.extract(['ClassroomID'], 'timetable of 10c')[0], {'ClassroomID': '10C'})
+
+
+if __name__ == '__main__':
+    unittest.main()
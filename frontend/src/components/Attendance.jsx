@@ -40,7 +40,7 @@ const Attendance = () => {
     try {
       setLoading(true);
       setError(null);
-      const response = await attendanceService.getAttendance(
+      const response = await attendanceService.getAttendanceGrid(
         id,
         startDate || null,
         endDate || null
@@ -70,58 +70,24 @@ const Attendance = () => {
     }
   };
 
-  const processAttendanceData = (data) => {
-    // Process data for graph
-    const attendanceByDate = {};
-
-    // Group attendance by date
-    data.forEach((record) => {
-      const date = record.Date;
-      if (!attendanceByDate[date]) {
-        attendanceByDate[date] = {
-          date,
-          presentCount: 0,
-          totalStudents: 0,
-          presentPercentage: 0,
-        };
-      }
-      attendanceByDate[date].totalStudents++;
-      if (record.Status === 1) {
-        attendanceByDate[date].presentCount++;
-      }
-    });
-
-    // Calculate percentages
-    Object.values(attendanceByDate).forEach((dayData) => {
-      dayData.presentPercentage = (dayData.presentCount / dayData.totalStudents) * 100;
-    });
-
-    // Sort by date
-    const graphDataArray = Object.values(attendanceByDate).sort(
-      (a, b) => new Date(a.date) - new Date(b.date)
-    );
+  const processAttendanceData = (grid) => {
+    // Daily present counts come pre-aggregated from the register grid
+    const graphDataArray = grid.Daily.map((day) => ({
+      date: day.Date,
+      presentCount: day.Present,
+      totalStudents: day.Total,
+      presentPercentage: (day.Present / day.Total) * 100,
+    }));
     setGraphData(graphDataArray);
 
     // Process student statistics
-    const studentAttendance = {};
-    const uniqueDates = new Set(data.map(record => record.Date));
-    const totalDays = uniqueDates.size;
-
-    data.forEach((record) => {
-      if (!studentAttendance[record.StudentID]) {
-        studentAttendance[record.StudentID] = {
-          studentId: record.StudentID,
-          studentName: record.StudentID, // You might want to add student names to the API response
-          daysPresent: 0,
-          totalDays,
-        };
-      }
-      if (record.Status === 1) {
-        studentAttendance[record.StudentID].daysPresent++;
-      }
-    });
-
-    const studentStatsArray = Object.values(studentAttendance);
+    const totalDays = grid.Dates.length;
+    const studentStatsArray = grid.Students.map((student) => ({
+      studentId: student.StudentID,
+      studentName: student.Name,
+      daysPresent: student.DaysPresent,
+      totalDays,
+    }));
     setStudentStats(studentStatsArray);
   };
 
@@ -161,6 +127,13 @@ const Attendance = () => {
         </Alert>
       )}
 
+      {attendanceData.Truncated && (
+        <Alert severity="info" sx={{ mb: 2 }}>
+          Showing the latest {attendanceData.Dates.length} recorded days from {attendanceData.StartDate}.
+          Set the end date to {attendanceData.EarlierEndDate} to see earlier days.
+        </Alert>
+      )}
+
       <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 4 }}>
         <Typography variant="h5" component="h2" fontWeight="bold">
           Attendance Report
@@ -76,6 +76,19 @@ export const attendanceService = {
       }
     });
     return response.data;
+  },
+
+  // Per-student / per-day register grid, pivoted on the server
+  getAttendanceGrid: async (classroomId, startDate, endDate) => {
+    const response = await api.get(`/attendance/`, {
+      params: {
+        ClassroomID: classroomId,
+        StartDate: startDate,
+        EndDate: endDate,
+        View: 'grid'
+      }
+    });
+    return response.data;
   }
 };
 
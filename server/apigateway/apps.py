@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApigatewayConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apigateway'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers the SyllabusPlan invalidation handlers)
@@ -0,0 +1,345 @@
+from datetime import date, timedelta
+from django.db.models import Count, Max, Q, Case, When
+from .models import Attendance, Student, StudentAttendanceMonth, ClassroomAttendanceDay
+
+# Window of the class attendance returned when no StartDate/EndDate is given,
+# ending at the latest recorded date of the class.
+CLASSROOM_DEFAULT_WINDOW_DAYS = 30
+# Upper bound on the recorded dates pivoted into one register grid (one SQL column each)
+REGISTER_GRID_MAX_DATES = 200
+# Students present on fewer than this percentage of recorded days are chronically absent
+CHRONIC_ABSENCE_THRESHOLD = 90
+
+
+class AttendanceReportError(ValueError):
+    """Invalid attendance report request, reported as a 400 response."""
+
+
+def filter_dates(attendance, start_date=None, end_date=None):
+    if start_date and end_date:
+        return attendance.filter(Date__range=[start_date, end_date])
+    elif start_date:
+        return attendance.filter(Date__gte=start_date)
+    elif end_date:
+        return attendance.filter(Date__lte=end_date)
+    return attendance
+
+
+def classroom_attendance(classroom_id, start_date=None, end_date=None, default_window=True):
+    """
+    Attendance of a classroom as a single join on StudentID__ClassroomID.
+    Without a date range and with default_window, only the last CLASSROOM_DEFAULT_WINDOW_DAYS
+    up to the latest recorded date of the class are returned (exports pass False).
+    Returns (queryset, start_date, end_date); raises AttendanceReportError on an invalid date.
+    """
+    start_date, end_date = parse_date(start_date), parse_date(end_date)
+    attendance = Attendance.objects.filter(StudentID__ClassroomID=classroom_id)
+
+    if default_window and not start_date and not end_date:
+        end_date = attendance.aggregate(latest=Max('Date'))['latest']
+        if end_date is None:
+            return attendance.none(), None, None
+        start_date = end_date - timedelta(days=CLASSROOM_DEFAULT_WINDOW_DAYS - 1)
+
+    return filter_dates(attendance, start_date, end_date), start_date, end_date
+
+
+def register_grid(classroom_id, start_date=None, end_date=None):
+    """
+    Per-day / per-student register of a classroom, pivoted in SQL:
+    one row per student with a conditional MAX(Status) column per recorded date,
+    plus per-day present/total counts for the class.
+    A range with more than REGISTER_GRID_MAX_DATES recorded dates is clamped to its latest
+    dates; Truncated and EarlierEndDate tell the client how to fetch the older ones.
+    """
+    attendance, start_date, end_date = classroom_attendance(classroom_id, start_date, end_date)
+
+    dates = list(attendance.order_by('Date').values_list('Date', flat=True).distinct())
+    truncated = len(dates) > REGISTER_GRID_MAX_DATES
+    earlier_end_date = None
+    if truncated:
+        earlier_end_date = dates[-REGISTER_GRID_MAX_DATES - 1]
+        dates = dates[-REGISTER_GRID_MAX_DATES:]
+        start_date = dates[0]
+        attendance = attendance.filter(Date__gte=start_date)
+
+    day_columns = {f"day_{index}": day for index, day in enumerate(dates)}
+    students = attendance.order_by('StudentID').values('StudentID', 'StudentID__Name').annotate(
+        DaysPresent=Count('AttendanceID', filter=Q(Status=1)),
+        TotalDays=Count('AttendanceID'),
+        **{column: Max(Case(When(Date=day, then='Status'))) for column, day in day_columns.items()},
+    )
+    daily = attendance.order_by('Date').values('Date').annotate(
+        Present=Count('AttendanceID', filter=Q(Status=1)),
+        Total=Count('AttendanceID'),
+    )
+
+    return {
+        "ClassroomID": classroom_id,
+        "StartDate": start_date,
+        "EndDate": end_date,
+        "Truncated": truncated,
+        "EarlierEndDate": earlier_end_date,  # EndDate of the previous chunk when Truncated
+        "Dates": dates,
+        "Students": [
+            {
+                "StudentID": row["StudentID"],
+                "Name": row["StudentID__Name"],
+                "DaysPresent": row["DaysPresent"],
+                "TotalDays": row["TotalDays"],
+                "Statuses": [row[column] for column in day_columns],  # null -> no record that day
+            }
+            for row in students
+        ],
+        "Daily": list(daily),
+    }
+
+
+# Attendance rollups
+#
+# StudentAttendanceMonth keeps one row per student per month with bitmasks of the
+# recorded / present days, ClassroomAttendanceDay one row per classroom per day with
+# present / total counts. Every write to Attendance refreshes only the buckets it touched.
+
+def parse_date(value):
+    if value in (None, '') or isinstance(value, date):
+        return value or None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise AttendanceReportError(f"Invalid date: {value}")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(day):
+    next_month = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def _delete_buckets(model, keys, key_field, date_field):
+    """Delete rollup rows of buckets that no longer have any attendance record."""
+    if not keys:
+        return
+    condition = Q()
+    for key, day in keys:
+        condition |= Q(**{key_field: key, date_field: day})
+    model.objects.filter(condition).delete()
+
+
+def refresh_student_months(student_months):
+    """Recompute the StudentAttendanceMonth rows of the given (StudentID, month start) buckets."""
+    if not student_months:
+        return
+    months = {month for _, month in student_months}
+    rows = Attendance.objects.filter(
+        StudentID__in={student_id for student_id, _ in student_months},
+        Date__gte=min(months), Date__lte=month_end(max(months)),
+    ).values_list('StudentID', 'Date', 'Status')
+
+    masks = {key: [0, 0] for key in student_months}  # [present, recorded]
+    for student_id, day, attendance_status in rows:
+        mask = masks.get((student_id, month_start(day)))
+        if mask is None:
+            continue
+        bit = 1 << (day.day - 1)
+        mask[1] |= bit
+        if attendance_status == 1:
+            mask[0] |= bit
+
+    StudentAttendanceMonth.objects.bulk_create(
+        [
+            StudentAttendanceMonth(
+                StudentID_id=student_id, Month=month, PresentDays=present, RecordedDays=recorded,
+                DaysPresent=present.bit_count(), DaysRecorded=recorded.bit_count(),
+            )
+            for (student_id, month), (present, recorded) in masks.items() if recorded
+        ],
+        update_conflicts=True,
+        unique_fields=['StudentID', 'Month'],
+        update_fields=['PresentDays', 'RecordedDays', 'DaysPresent', 'DaysRecorded'],
+    )
+    _delete_buckets(StudentAttendanceMonth, [key for key, (_, recorded) in masks.items() if not recorded],
+                    'StudentID', 'Month')
+
+
+def refresh_classroom_days(classroom_days):
+    """Recompute the ClassroomAttendanceDay rows of the given (ClassroomID, date) buckets."""
+    if not classroom_days:
+        return
+    counts = {key: (0, 0) for key in classroom_days}
+    grouped = Attendance.objects.filter(
+        StudentID__ClassroomID__in={classroom_id for classroom_id, _ in classroom_days},
+        Date__in={day for _, day in classroom_days},
+    ).values('StudentID__ClassroomID', 'Date').annotate(
+        Present=Count('AttendanceID', filter=Q(Status=1)),
+        Total=Count('AttendanceID'),
+    )
+    for row in grouped:
+        key = (row['StudentID__ClassroomID'], row['Date'])
+        if key in counts:
+            counts[key] = (row['Present'], row['Total'])
+
+    ClassroomAttendanceDay.objects.bulk_create(
+        [
+            ClassroomAttendanceDay(ClassroomID_id=classroom_id, Date=day, Present=present, Total=total)
+            for (classroom_id, day), (present, total) in counts.items() if total
+        ],
+        update_conflicts=True,
+        unique_fields=['ClassroomID', 'Date'],
+        update_fields=['Present', 'Total'],
+    )
+    _delete_buckets(ClassroomAttendanceDay, [key for key, (_, total) in counts.items() if not total],
+                    'ClassroomID', 'Date')
+
+
+def refresh_attendance_rollups(records, student_months=True):
+    """
+    Refresh the rollup buckets touched by written attendance records, given as
+    (StudentID, Date) pairs. student_months=False only refreshes the classroom days
+    (used while a student and its rollups are being deleted).
+    """
+    records = {(student_id, parse_date(day)) for student_id, day in records}
+    if not records:
+        return
+    if student_months:
+        refresh_student_months({(student_id, month_start(day)) for student_id, day in records})
+
+    classrooms = dict(Student.objects.filter(
+        StudentID__in={student_id for student_id, _ in records}
+    ).values_list('StudentID', 'ClassroomID'))
+    refresh_classroom_days({
+        (classrooms[student_id], day) for student_id, day in records if classrooms.get(student_id)
+    })
+
+
+def rebuild_attendance_rollups(chunk_size=5000):
+    """Rebuild every rollup row from the raw attendance table in one pass."""
+    StudentAttendanceMonth.objects.all().delete()
+    ClassroomAttendanceDay.objects.all().delete()
+
+    masks = {}
+    rows = Attendance.objects.values_list('StudentID', 'Date', 'Status').iterator(chunk_size=chunk_size)
+    for student_id, day, attendance_status in rows:
+        mask = masks.setdefault((student_id, month_start(day)), [0, 0])
+        bit = 1 << (day.day - 1)
+        mask[1] |= bit
+        if attendance_status == 1:
+            mask[0] |= bit
+    StudentAttendanceMonth.objects.bulk_create(
+        (
+            StudentAttendanceMonth(
+                StudentID_id=student_id, Month=month, PresentDays=present, RecordedDays=recorded,
+                DaysPresent=present.bit_count(), DaysRecorded=recorded.bit_count(),
+            )
+            for (student_id, month), (present, recorded) in masks.items()
+        ),
+        batch_size=chunk_size,
+    )
+
+    grouped = Attendance.objects.filter(StudentID__ClassroomID__isnull=False).values(
+        'StudentID__ClassroomID', 'Date'
+    ).annotate(Present=Count('AttendanceID', filter=Q(Status=1)), Total=Count('AttendanceID'))
+    ClassroomAttendanceDay.objects.bulk_create(
+        (
+            ClassroomAttendanceDay(ClassroomID_id=row['StudentID__ClassroomID'], Date=row['Date'],
+                                   Present=row['Present'], Total=row['Total'])
+            for row in grouped.iterator(chunk_size=chunk_size)
+        ),
+        batch_size=chunk_size,
+    )
+    return len(masks)
+
+
+def _range_mask(month, start_date, end_date):
+    """Bitmask of the days of `month` that fall inside [start_date, end_date]."""
+    first_day = start_date.day if start_date and month_start(start_date) == month else 1
+    last_day = end_date.day if end_date and month_start(end_date) == month else 31
+    return ((1 << last_day) - 1) & ~((1 << (first_day - 1)) - 1)
+
+
+def summarize_student(months, threshold):
+    """Percentage, streaks and chronic absence of one student from its ordered (present, recorded) month masks."""
+    days_present = days_recorded = 0
+    longest_absence = current_absence = 0
+    streak_status, streak_days = None, 0
+
+    for present, recorded in months:
+        days_present += present.bit_count()
+        days_recorded += recorded.bit_count()
+        remaining = recorded
+        while remaining:
+            bit = remaining & -remaining  # Lowest recorded day left in this month
+            remaining ^= bit
+            is_present = bool(present & bit)
+
+            current_absence = 0 if is_present else current_absence + 1
+            longest_absence = max(longest_absence, current_absence)
+            if is_present == streak_status:
+                streak_days += 1
+            else:
+                streak_status, streak_days = is_present, 1
+
+    percentage = round(days_present / days_recorded * 100, 2) if days_recorded else None
+    return {
+        "DaysPresent": days_present,
+        "DaysRecorded": days_recorded,
+        "Percentage": percentage,
+        "CurrentStreak": {
+            "Status": None if streak_status is None else ("Present" if streak_status else "Absent"),
+            "Days": streak_days,
+        },
+        "LongestAbsence": longest_absence,
+        "ChronicAbsence": percentage is not None and percentage < threshold,
+    }
+
+
+def attendance_summary(student_id=None, classroom_id=None, start_date=None, end_date=None, threshold=None):
+    """
+    Attendance percentage, current streak, longest absence and chronic absence per student
+    (optionally of one student or one classroom), answered from the rollup tables only.
+    """
+    start_date, end_date = parse_date(start_date), parse_date(end_date)
+    threshold = CHRONIC_ABSENCE_THRESHOLD if threshold is None else threshold
+
+    rollups = StudentAttendanceMonth.objects.all()
+    if student_id:
+        rollups = rollups.filter(StudentID=student_id)
+    elif classroom_id:
+        rollups = rollups.filter(StudentID__ClassroomID=classroom_id)
+    if start_date:
+        rollups = rollups.filter(Month__gte=month_start(start_date))
+    if end_date:
+        rollups = rollups.filter(Month__lte=end_date)
+
+    months_by_student = {}
+    for sid, month, present, recorded in rollups.order_by('StudentID', 'Month').values_list(
+            'StudentID', 'Month', 'PresentDays', 'RecordedDays'):
+        in_range = _range_mask(month, start_date, end_date)
+        months_by_student.setdefault(sid, []).append((present & in_range, recorded & in_range))
+
+    students = [
+        {"StudentID": sid, **summarize_student(months, threshold)}
+        for sid, months in months_by_student.items()
+    ]
+    summary = {
+        "StartDate": start_date,
+        "EndDate": end_date,
+        "Threshold": threshold,
+        "Students": students,
+        "ChronicAbsentees": [student["StudentID"] for student in students if student["ChronicAbsence"]],
+    }
+
+    if classroom_id and not student_id:
+        days = filter_dates(ClassroomAttendanceDay.objects.filter(ClassroomID=classroom_id), start_date, end_date)
+        daily = list(days.order_by('Date').values('Date', 'Present', 'Total'))
+        present = sum(day["Present"] for day in daily)
+        total = sum(day["Total"] for day in daily)
+        summary["Classroom"] = {
+            "ClassroomID": classroom_id,
+            "Percentage": round(present / total * 100, 2) if total else None,
+            "Daily": daily,
+        }
+    return summary
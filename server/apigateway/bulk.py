@@ -0,0 +1,234 @@
+from django.db import models, transaction
+from django.dispatch import Signal
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+# Bulk write mode of the list POST endpoints.
+#
+# POST /<resource>/?Bulk=true               -> validate every row, then INSERT them with bulk_create in one
+#                                              transaction; nothing is written if any row is invalid
+# POST /<resource>/?Bulk=true&Partial=true  -> write the valid rows and report the invalid ones
+# POST /attendance/upsert/                   -> idempotent merge, reports inserted / updated / unchanged rows
+#
+# Foreign keys and unique fields are checked with one set-based query per field instead of
+# the per-row lookups of the regular serializers. bulk_create does not send post_save, so
+# `bulk_written` is sent once per batch for the syllabus plan / attendance rollup handlers.
+
+BULK_BATCH_SIZE = 500
+
+# sender=model class, instances=list of the written model instances
+bulk_written = Signal()
+
+
+class BulkWriteError(ValueError):
+    """Malformed bulk payload, reported as a 400 response."""
+
+
+def is_bulk_request(request):
+    return request.GET.get('Bulk', '').lower() in ('true', '1', 'yes')
+
+
+def _plain_field(field, model_field):
+    """Serializer field for the raw primary key value of a foreign key (no per-row lookup)."""
+    target_pk = model_field.target_field
+    options = {'required': field.required, 'allow_null': field.allow_null}
+    if isinstance(target_pk, (models.AutoField, models.IntegerField)):
+        return serializers.IntegerField(**options)
+    return serializers.CharField(max_length=target_pk.max_length, **options)
+
+
+def make_bulk_serializer(serializer_class):
+    """
+    Variant of a ModelSerializer that only does per-row field validation:
+    foreign keys stay raw primary keys and unique / unique_together checks are left to
+    the set-based queries of bulk_write.
+    """
+    model = serializer_class.Meta.model
+
+    class BulkSerializer(serializer_class):
+        class Meta(serializer_class.Meta):
+            validators = []
+
+        def get_fields(self):
+            fields = super().get_fields()
+            for name, field in list(fields.items()):
+                if field.read_only:
+                    continue
+                if isinstance(field, serializers.ManyRelatedField):
+                    raise BulkWriteError(f"Bulk mode does not support the many-to-many field {name}")
+                if isinstance(field, serializers.RelatedField):
+                    fields[name] = _plain_field(field, model._meta.get_field(field.source or name))
+                else:
+                    field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+            return fields
+
+    BulkSerializer.__name__ = f"Bulk{serializer_class.__name__}"
+    return BulkSerializer
+
+
+def _add_error(errors, index, field, message):
+    errors.setdefault(index, {}).setdefault(field, []).append(message)
+
+
+def _check_foreign_keys(model, rows, errors):
+    for model_field in model._meta.concrete_fields:
+        if not isinstance(model_field, models.ForeignKey):
+            continue
+        values = {row[model_field.name] for row in rows.values() if row.get(model_field.name) is not None}
+        if not values:
+            continue
+        existing = set(model_field.related_model._default_manager.filter(pk__in=values).values_list('pk', flat=True))
+        for index, row in rows.items():
+            value = row.get(model_field.name)
+            if value is not None and value not in existing:
+                _add_error(errors, index, model_field.name, f'Invalid pk "{value}" - object does not exist.')
+
+
+def _check_unique(model, instances, errors, conflict_fields):
+    """Unique fields must be unique within the batch and not exist yet (except the upsert key)."""
+    unique_sets = [(field.name,) for field in model._meta.concrete_fields
+                   if field.unique and not isinstance(field, models.AutoField)]
+    unique_sets += [tuple(fields) for fields in model._meta.unique_together]
+
+    for fields in unique_sets:
+        is_conflict_target = conflict_fields and set(fields) == set(conflict_fields)
+        attnames = [model._meta.get_field(field).attname for field in fields]
+        seen = {}
+        for index, instance in instances.items():
+            key = tuple(getattr(instance, attname) for attname in attnames)
+            if any(value is None for value in key):
+                continue
+            if key in seen:
+                _add_error(errors, index, fields[-1], f"Duplicate of row {seen[key]} for {', '.join(fields)}.")
+            else:
+                seen[key] = index
+        if is_conflict_target or not seen:
+            continue
+
+        if len(fields) == 1:
+            existing = {(value,) for value in model._default_manager.filter(
+                **{f"{fields[0]}__in": [key[0] for key in seen]}).values_list(fields[0], flat=True)}
+        else:
+            existing = set(model._default_manager.filter(
+                **{f"{field}__in": {key[i] for key in seen} for i, field in enumerate(fields)}
+            ).values_list(*fields))
+        for key, index in seen.items():
+            if key in existing:
+                _add_error(errors, index, fields[-1], f"{model.__name__} with this {', '.join(fields)} already exists.")
+
+
+def _build_instance(model, row, prepare=None):
+    values = {}
+    for name, value in row.items():
+        model_field = model._meta.get_field(name)
+        values[model_field.attname if isinstance(model_field, models.ForeignKey) else name] = value
+    instance = model(**values)
+    if prepare:
+        prepare(instance)
+    return instance
+
+
+def _validate_bulk(request, serializer_class, conflict_fields=None, prepare=None):
+    """Return ({index: unsaved instance} of the valid rows, [{index, errors}] of the invalid ones)."""
+    if not isinstance(request.data, list):
+        raise BulkWriteError('Bulk mode expects a list of records')
+    model = serializer_class.Meta.model
+
+    bulk_serializer_class = make_bulk_serializer(serializer_class)
+    errors, rows = {}, {}
+    for index, record in enumerate(request.data):
+        serializer = bulk_serializer_class(data=record)
+        if serializer.is_valid():
+            rows[index] = serializer.validated_data
+        else:
+            errors[index] = serializer.errors
+
+    _check_foreign_keys(model, rows, errors)
+    instances = {index: _build_instance(model, row, prepare) for index, row in rows.items() if index not in errors}
+    _check_unique(model, instances, errors, conflict_fields)
+    valid = {index: instance for index, instance in instances.items() if index not in errors}
+    return valid, [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+
+
+def _write(model, instances, conflict_fields=None, update_fields=None):
+    options = {}
+    if conflict_fields:
+        options = {'update_conflicts': True, 'unique_fields': conflict_fields, 'update_fields': update_fields}
+    with transaction.atomic():
+        model._default_manager.bulk_create(instances, batch_size=BULK_BATCH_SIZE, **options)
+        bulk_written.send(sender=model, instances=instances)
+
+
+def is_partial_request(request):
+    return request.GET.get('Partial', '').lower() in ('true', '1', 'yes')
+
+
+def bulk_write(request, serializer_class, conflict_fields=None, update_fields=None, prepare=None):
+    """
+    Validate a list payload row by row, check foreign keys and uniqueness set-wise, then write
+    all valid rows with bulk_create inside one transaction. conflict_fields/update_fields turn the
+    INSERT into an upsert on that unique key. prepare(instance) fills values normally set in save().
+    """
+    try:
+        instances, row_errors = _validate_bulk(request, serializer_class, conflict_fields, prepare)
+    except BulkWriteError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if row_errors and not is_partial_request(request):
+        return Response({'written': 0, 'errors': row_errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    instances = list(instances.values())
+    _write(serializer_class.Meta.model, instances, conflict_fields, update_fields)
+    return Response({'written': len(instances), 'errors': row_errors}, status=status.HTTP_201_CREATED)
+
+
+def _existing_values(model, instances, key_fields, value_fields):
+    """{key: values} of the stored rows matching the batch keys, read with one query."""
+    key_attnames = [model._meta.get_field(field).attname for field in key_fields]
+    lookups = {f"{field}__in": {getattr(instance, attname) for instance in instances}
+               for field, attname in zip(key_fields, key_attnames)}
+    stored = model._default_manager.filter(**lookups).values_list(*key_fields, *value_fields)
+    return {tuple(row[:len(key_fields)]): tuple(row[len(key_fields):]) for row in stored}
+
+
+def bulk_upsert(request, serializer_class, conflict_fields, update_fields):
+    """
+    Idempotent variant of bulk_write: merge the batch on conflict_fields and report every row as
+    inserted / updated / unchanged. Unchanged rows are not written at all, so re-sending a batch is free.
+    Response: {inserted, updated, unchanged, results: [per input row], errors}
+    """
+    try:
+        instances, row_errors = _validate_bulk(request, serializer_class, conflict_fields)
+    except BulkWriteError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = ['error'] * len(request.data)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    if row_errors and not is_partial_request(request):
+        return Response({**counts, 'results': results, 'errors': row_errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    model = serializer_class.Meta.model
+    key_attnames = [model._meta.get_field(field).attname for field in conflict_fields]
+    value_attnames = [model._meta.get_field(field).attname for field in update_fields]
+    stored = _existing_values(model, instances.values(), conflict_fields, update_fields) if instances else {}
+
+    changed = []
+    for index, instance in instances.items():
+        key = tuple(getattr(instance, attname) for attname in key_attnames)
+        values = tuple(getattr(instance, attname) for attname in value_attnames)
+        if key not in stored:
+            results[index] = 'inserted'
+        elif stored[key] != values:
+            results[index] = 'updated'
+        else:
+            results[index] = 'unchanged'
+            continue
+        changed.append(instance)
+    for result in results:
+        if result in counts:
+            counts[result] += 1
+
+    if changed:
+        _write(model, changed, conflict_fields, update_fields)
+    return Response({**counts, 'results': results, 'errors': row_errors}, status=status.HTTP_200_OK)
@@ -0,0 +1,98 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+# Streaming export of large list endpoints (attendance, marks).
+#
+# GET /attendance/?format=csv                       -> text/csv, streamed
+# GET /attendance/  with Accept: application/x-ndjson -> one JSON object per line, streamed
+#
+# Rows are read with values_list().iterator(chunk_size=...), so memory stays constant
+# no matter how many rows are exported.
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return "".join(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b""
+        columns = list(rows[0].keys())
+        values = ([row.get(column) for column in columns] for row in rows)
+        return "".join(_csv_lines(columns, values)).encode(self.charset)
+
+
+EXPORT_RENDERERS = [NDJSONRenderer, CSVRenderer]
+EXPORT_FORMATS = {renderer.format for renderer in EXPORT_RENDERERS}
+
+
+class _LineBuffer:
+    """File-like sink for csv.writer that hands back each written line."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, value):
+        self.lines.append(value)
+
+    def pop(self):
+        value = "".join(self.lines)
+        self.lines.clear()
+        return value
+
+
+def _ndjson_lines(columns, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def _csv_lines(columns, rows):
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.pop()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.pop()
+
+
+def is_export_request(request):
+    return getattr(request, 'accepted_renderer', None) is not None and \
+        request.accepted_renderer.format in EXPORT_FORMATS
+
+
+def stream_export(request, queryset, columns, filename):
+    """
+    Stream `columns` of every row in queryset in the negotiated export format.
+    A `fields=` query parameter narrows the exported columns.
+    """
+    fields = [field.strip() for field in request.GET.get('fields', '').split(',') if field.strip()]
+    if fields:
+        columns = [column for column in columns if column in fields] or columns
+
+    rows = queryset.values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    renderer = request.accepted_renderer
+    if renderer.format == 'csv':
+        response = StreamingHttpResponse(_csv_lines(columns, rows), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    else:
+        response = StreamingHttpResponse(_ndjson_lines(columns, rows), content_type=f'{renderer.media_type}; charset=utf-8')
+    return response
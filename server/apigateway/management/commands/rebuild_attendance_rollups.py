@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apigateway.attendance_reports import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-student monthly and per-classroom daily attendance rollups from raw attendance."
+
+    def handle(self, *args, **options):
+        months = rebuild_attendance_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {months} student-month attendance rollups."))
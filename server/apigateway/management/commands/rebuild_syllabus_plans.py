@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apigateway.syllabus_planning import rebuild_syllabus_plans
+
+
+class Command(BaseCommand):
+    help = "Recompute and store the module completion plans of every syllabus (or only the given ones)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('syllabus_ids', nargs='*', help="SyllabusIDs to rebuild, all syllabi if omitted")
+
+    def handle(self, *args, **options):
+        plans = rebuild_syllabus_plans(options['syllabus_ids'] or None)
+        module_count = sum(len(plan) for plan in plans.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(plans)} syllabus plans covering {module_count} modules."
+        ))
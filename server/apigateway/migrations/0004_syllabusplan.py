@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apigateway', '0003_alter_syllabus_syllabusid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyllabusPlan',
+            fields=[
+                ('SyllabusID', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='apigateway.syllabus')),
+                ('PlannedOn', models.DateField()),
+                ('ModuleDates', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
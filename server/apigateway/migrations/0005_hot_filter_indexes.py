@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apigateway', '0004_syllabusplan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['Date', 'StudentID'], name='attendance_date_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['DateOfExam'], name='exam_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['SyllabusID', 'DateOfExam'], name='exam_syllabus_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marks',
+            index=models.Index(fields=['ExamID', 'StudentID'], name='marks_exam_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetable',
+            index=models.Index(fields=['ClassroomID', 'Day', 'Slot'], name='timetable_class_day_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetable',
+            index=models.Index(fields=['SubjectID', 'ClassroomID'], name='timetable_subject_class_idx'),
+        ),
+    ]
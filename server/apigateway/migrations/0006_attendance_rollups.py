@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apigateway', '0005_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassroomAttendanceDay',
+            fields=[
+                ('RollupID', models.AutoField(primary_key=True, serialize=False)),
+                ('Date', models.DateField()),
+                ('Present', models.IntegerField(default=0)),
+                ('Total', models.IntegerField(default=0)),
+                ('ClassroomID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='apigateway.classroom')),
+            ],
+            options={
+                'unique_together': {('ClassroomID', 'Date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentAttendanceMonth',
+            fields=[
+                ('RollupID', models.AutoField(primary_key=True, serialize=False)),
+                ('Month', models.DateField()),
+                ('PresentDays', models.BigIntegerField(default=0)),
+                ('RecordedDays', models.BigIntegerField(default=0)),
+                ('DaysPresent', models.IntegerField(default=0)),
+                ('DaysRecorded', models.IntegerField(default=0)),
+                ('StudentID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='apigateway.student')),
+            ],
+            options={
+                'unique_together': {('StudentID', 'Month')},
+            },
+        ),
+    ]
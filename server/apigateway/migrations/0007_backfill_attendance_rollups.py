@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+BATCH_SIZE = 5000
+
+
+def backfill_attendance_rollups(apps, schema_editor):
+    # 0006 created the rollup tables empty; fill them from the existing attendance records.
+    # Uses the historical models only, so later model changes cannot break this migration
+    # (the same computation as attendance_reports.rebuild_attendance_rollups at this point).
+    Attendance = apps.get_model('apigateway', 'Attendance')
+    StudentAttendanceMonth = apps.get_model('apigateway', 'StudentAttendanceMonth')
+    ClassroomAttendanceDay = apps.get_model('apigateway', 'ClassroomAttendanceDay')
+
+    masks = {}  # (StudentID, month start) -> [present bitmask, recorded bitmask]
+    rows = Attendance.objects.values_list('StudentID', 'Date', 'Status').iterator(chunk_size=BATCH_SIZE)
+    for student_id, day, attendance_status in rows:
+        mask = masks.setdefault((student_id, day.replace(day=1)), [0, 0])
+        bit = 1 << (day.day - 1)
+        mask[1] |= bit
+        if attendance_status == 1:
+            mask[0] |= bit
+    StudentAttendanceMonth.objects.bulk_create(
+        (
+            StudentAttendanceMonth(
+                StudentID_id=student_id, Month=month, PresentDays=present, RecordedDays=recorded,
+                DaysPresent=present.bit_count(), DaysRecorded=recorded.bit_count(),
+            )
+            for (student_id, month), (present, recorded) in masks.items()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    grouped = Attendance.objects.filter(StudentID__ClassroomID__isnull=False).values(
+        'StudentID__ClassroomID', 'Date'
+    ).annotate(Present=Count('AttendanceID', filter=Q(Status=1)), Total=Count('AttendanceID'))
+    ClassroomAttendanceDay.objects.bulk_create(
+        (
+            ClassroomAttendanceDay(ClassroomID_id=row['StudentID__ClassroomID'], Date=row['Date'],
+                                   Present=row['Present'], Total=row['Total'])
+            for row in grouped.iterator(chunk_size=BATCH_SIZE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def remove_attendance_rollups(apps, schema_editor):
+    apps.get_model('apigateway', 'StudentAttendanceMonth').objects.all().delete()
+    apps.get_model('apigateway', 'ClassroomAttendanceDay').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apigateway', '0006_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_attendance_rollups, remove_attendance_rollups),
+    ]
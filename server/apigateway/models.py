@@ -44,7 +44,10 @@ class Attendance(models.Model):
     Status = models.IntegerField(default=0)  # 0 -> Absent, 1 -> Present
 
     class Meta:
-        unique_together = ('StudentID', 'Date')  # Ensures one attendance record per student per day
+        unique_together = ('StudentID', 'Date')  # Ensures one attendance record per student per day (also the (StudentID, Date) index)
+        indexes = [
+            models.Index(fields=['Date', 'StudentID'], name='attendance_date_student_idx'),  # School/class-wide date ranges
+        ]
 
     def __str__(self):
         return f"{self.StudentID.Name} - {self.Date} - {'Present' if self.Status == 1 else 'Absent'}"
@@ -62,6 +65,12 @@ class TimeTable(models.Model):
     Slot = models.IntegerField()  # Example: 1, 2, 3 (Period numbers)
     SubjectID = models.ForeignKey('Subject', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['ClassroomID', 'Day', 'Slot'], name='timetable_class_day_slot_idx'),
+            models.Index(fields=['SubjectID', 'ClassroomID'], name='timetable_subject_class_idx'),
+        ]
+
     def __str__(self):
         return f"{self.CID} - {self.Day} - Slot {self.Slot}"
 
@@ -105,6 +114,12 @@ class Exam(models.Model):
     Chapters = models.ManyToManyField('Chapter', blank=True)  # Many-to-many relationship with Chapter
     SyllabusID = models.ForeignKey('Syllabus', on_delete=models.CASCADE)  # Foreign key to Syllabus
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['DateOfExam'], name='exam_date_idx'),
+            models.Index(fields=['SyllabusID', 'DateOfExam'], name='exam_syllabus_date_idx'),
+        ]
+
     def __str__(self):
         return self.ExamName
 
@@ -114,5 +129,48 @@ class Marks(models.Model):
     ExamID = models.ForeignKey('Exam', on_delete=models.CASCADE)  # Foreign key to Exam
     Marks = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['ExamID', 'StudentID'], name='marks_exam_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"MarksID: {self.MarksID} - {self.StudentID} - {self.ExamID}: {self.Marks}"
+
+class SyllabusPlan(models.Model):
+    SyllabusID = models.OneToOneField('Syllabus', on_delete=models.CASCADE, primary_key=True)
+    PlannedOn = models.DateField()  # Start date the plan was computed from, stale on any other day
+    ModuleDates = models.JSONField(default=dict)  # {ModuleID: "YYYY-MM-DD"} estimated completion dates
+
+    def __str__(self):
+        return f"Plan for {self.SyllabusID_id} ({self.PlannedOn})"
+
+
+class StudentAttendanceMonth(models.Model):
+    RollupID = models.AutoField(primary_key=True)
+    StudentID = models.ForeignKey('Student', on_delete=models.CASCADE)
+    Month = models.DateField()  # First day of the month
+    PresentDays = models.BigIntegerField(default=0)  # Bitmask, bit d-1 set -> present on day d
+    RecordedDays = models.BigIntegerField(default=0)  # Bitmask, bit d-1 set -> attendance recorded on day d
+    DaysPresent = models.IntegerField(default=0)
+    DaysRecorded = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('StudentID', 'Month')  # One rollup row per student per month
+
+    def __str__(self):
+        return f"{self.StudentID_id} - {self.Month:%Y-%m} - {self.DaysPresent}/{self.DaysRecorded}"
+
+
+class ClassroomAttendanceDay(models.Model):
+    RollupID = models.AutoField(primary_key=True)
+    ClassroomID = models.ForeignKey('Classroom', on_delete=models.CASCADE)
+    Date = models.DateField()
+    Present = models.IntegerField(default=0)
+    Total = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('ClassroomID', 'Date')  # One rollup row per classroom per day
+
     def __str__(self):
-        return f"MarksID: {self.MarksID} - {self.StudentID} - {self.ExamID}: {self.Marks}"
\ No newline at end of file
+        return f"{self.ClassroomID_id} - {self.Date} - {self.Present}/{self.Total}"
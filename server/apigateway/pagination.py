@@ -0,0 +1,153 @@
+import base64
+import json
+from datetime import date
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+# Keyset (cursor) pagination and field projection shared by every *_list endpoint.
+#
+# GET /<resource>/?limit=100                 -> {"results": [...], "next_cursor": "<cursor>" | null}
+# GET /<resource>/?limit=100&cursor=<cursor> -> next page, continuing after the last row of the previous one
+# GET /<resource>/?fields=StudentID,Name     -> only these keys in every row (paginated or not)
+# GET /<resource>/?paginate=false            -> legacy full response (a plain list) when paginating by default
+
+DEFAULT_PAGINATION = {
+    'PAGINATE_BY_DEFAULT': False,
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+}
+
+
+class ListQueryError(ValueError):
+    """Invalid limit/cursor/paginate query parameter, reported as a 400 response."""
+
+
+def get_pagination_settings():
+    return {**DEFAULT_PAGINATION, **getattr(settings, 'LIST_PAGINATION', {})}
+
+
+def parse_list_params(request):
+    """Read the fields/limit/cursor/paginate query parameters of a list request."""
+    config = get_pagination_settings()
+    params = request.GET
+
+    fields = [field.strip() for field in params.get('fields', '').split(',') if field.strip()]
+
+    paginate = params.get('paginate')
+    if paginate is None:
+        paginate = config['PAGINATE_BY_DEFAULT'] or 'limit' in params or 'cursor' in params
+    else:
+        paginate = paginate.lower() not in ('false', '0', 'no')
+
+    limit = params.get('limit', config['PAGE_SIZE'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ListQueryError("limit must be an integer")
+    if limit <= 0:
+        raise ListQueryError("limit must be positive")
+
+    return {
+        'fields': fields,
+        'paginate': paginate,
+        'limit': min(limit, config['MAX_PAGE_SIZE']),
+        'cursor': params.get('cursor'),
+    }
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, date) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, ordering, model):
+    """Cursor values converted to the Python types of the ordering fields of model."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ListQueryError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ListQueryError("Invalid cursor")
+
+    decoded = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        model_field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        if not isinstance(value, (str, int, float, bool)):
+            raise ListQueryError("Invalid cursor")  # null, lists and objects never come from encode_cursor
+        try:
+            decoded.append(model_field.to_python(value))
+        except (ValidationError, ValueError, TypeError):
+            raise ListQueryError("Invalid cursor")
+    return decoded
+
+
+def keyset_filter(ordering, values):
+    """Rows strictly after `values` in `ordering`: (a > x) OR (a = x AND b > y) OR ..."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal_prefix = {previous.lstrip('-'): value for previous, value in zip(ordering[:index], values)}
+        condition |= Q(**equal_prefix, **{f"{name}__{lookup}": values[index]})
+    return condition
+
+
+def paginate_queryset(queryset, params, ordering):
+    """Return (rows of this page, cursor of the next page or None) for a keyset ordering."""
+    queryset = queryset.order_by(*ordering)
+    if params['cursor']:
+        values = decode_cursor(params['cursor'], ordering, queryset.model)
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    rows = list(queryset[:params['limit'] + 1])
+    if len(rows) <= params['limit']:
+        return rows, None
+    rows = rows[:params['limit']]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+
+
+def project_fields(data, fields):
+    if not fields:
+        return list(data)
+    return [{key: row[key] for key in fields if key in row} for row in data]
+
+
+def only_projected(queryset, serializer_class, fields, ordering):
+    """Load only the model columns needed for the projected ModelSerializer fields."""
+    if not fields or not issubclass(serializer_class, serializers.ModelSerializer):
+        return queryset
+    model = queryset.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    if not set(fields) <= concrete:
+        return queryset  # Many-to-many or computed fields, keep the full rows
+    ordering_fields = {field.lstrip('-') for field in ordering} - {'pk'}
+    return queryset.only(model._meta.pk.name, *fields, *ordering_fields)
+
+
+def list_response(request, queryset, serializer_class=None, ordering=('pk',), build=None):
+    """
+    Serialize a list endpoint with optional keyset pagination and field projection.
+    `build(rows)` turns model instances into response dicts, defaulting to serializer_class(many=True).
+    """
+    try:
+        params = parse_list_params(request)
+        if build is None:
+            queryset = only_projected(queryset, serializer_class, params['fields'], ordering)
+            build = lambda rows: serializer_class(rows, many=True).data
+
+        if not params['paginate']:
+            return Response(project_fields(build(queryset), params['fields']))
+
+        rows, next_cursor = paginate_queryset(queryset, params, ordering)
+    except ListQueryError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': project_fields(build(rows), params['fields']),
+        'next_cursor': next_cursor,
+    })
@@ -0,0 +1,106 @@
+from django.db.models import Q, QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import TimeTable, Syllabus, Chapter, Module, Attendance, Student
+from .syllabus_planning import invalidate_syllabus_plans
+from .attendance_reports import refresh_attendance_rollups, refresh_classroom_days
+from .bulk import bulk_written
+
+# Cached SyllabusPlan rows are dropped whenever a write can change a completion date.
+# pre_save remembers the syllabus an instance belonged to, so moving a module, chapter
+# or timetable slot invalidates both the old and the new syllabus.
+
+@receiver(pre_save, sender=Module)
+def remember_module_syllabus(sender, instance, **kwargs):
+    instance._previous_syllabus_ids = set(
+        Module.objects.filter(pk=instance.pk).values_list('ChapterID__SyllabusID', flat=True)
+    )
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_module_plans(sender, instance, **kwargs):
+    syllabus_ids = set(Chapter.objects.filter(pk=instance.ChapterID_id).values_list('SyllabusID', flat=True))
+    invalidate_syllabus_plans(syllabus_ids | getattr(instance, '_previous_syllabus_ids', set()))
+
+@receiver(pre_save, sender=Chapter)
+def remember_chapter_syllabus(sender, instance, **kwargs):
+    instance._previous_syllabus_ids = set(
+        Chapter.objects.filter(pk=instance.pk).values_list('SyllabusID', flat=True)
+    )
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+def invalidate_chapter_plans(sender, instance, **kwargs):
+    invalidate_syllabus_plans({instance.SyllabusID_id} | getattr(instance, '_previous_syllabus_ids', set()))
+
+@receiver(pre_save, sender=TimeTable)
+def remember_timetable_slot(sender, instance, **kwargs):
+    instance._previous_slot = TimeTable.objects.filter(pk=instance.pk).values_list('ClassroomID', 'SubjectID').first()
+
+@receiver(post_save, sender=TimeTable)
+@receiver(post_delete, sender=TimeTable)
+def invalidate_timetable_plans(sender, instance, **kwargs):
+    slots = Q(ClassroomID=instance.ClassroomID_id, SubjectID=instance.SubjectID_id)
+    previous_slot = getattr(instance, '_previous_slot', None)
+    if previous_slot:
+        slots |= Q(ClassroomID=previous_slot[0], SubjectID=previous_slot[1])
+    invalidate_syllabus_plans(Syllabus.objects.filter(slots).values_list('SyllabusID', flat=True))
+
+# Attendance rollups are refreshed for the (student, month) and (classroom, day)
+# buckets of both the previous and the new version of a written record.
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_bucket(sender, instance, **kwargs):
+    instance._previous_record = Attendance.objects.filter(pk=instance.pk).values_list('StudentID', 'Date').first()
+
+@receiver(post_save, sender=Attendance)
+def refresh_saved_attendance_rollups(sender, instance, **kwargs):
+    records = {(instance.StudentID_id, instance.Date)}
+    previous_record = getattr(instance, '_previous_record', None)
+    if previous_record:
+        records.add(previous_record)
+    refresh_attendance_rollups(records)
+
+@receiver(post_delete, sender=Attendance)
+def refresh_deleted_attendance_rollups(sender, instance, origin=None, **kwargs):
+    # When the student itself is deleted, its month rollups are deleted with it
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    refresh_attendance_rollups({(instance.StudentID_id, instance.Date)}, student_months=origin_model is not Student)
+
+# Moving a student to another classroom changes the day counts of both classrooms
+
+@receiver(pre_save, sender=Student)
+def remember_student_classroom(sender, instance, **kwargs):
+    instance._previous_classroom_id = Student.objects.filter(pk=instance.pk).values_list('ClassroomID', flat=True).first()
+
+@receiver(post_save, sender=Student)
+def refresh_moved_student_rollups(sender, instance, created, **kwargs):
+    previous_classroom_id = getattr(instance, '_previous_classroom_id', None)
+    if created or previous_classroom_id == instance.ClassroomID_id:
+        return
+    dates = set(Attendance.objects.filter(StudentID=instance).values_list('Date', flat=True))
+    classroom_ids = {previous_classroom_id, instance.ClassroomID_id} - {None}
+    refresh_classroom_days({(classroom_id, day) for classroom_id in classroom_ids for day in dates})
+
+# bulk_create sends no post_save, bulk_write reports each written batch instead
+
+@receiver(bulk_written, sender=Attendance)
+def refresh_bulk_attendance_rollups(sender, instances, **kwargs):
+    refresh_attendance_rollups({(attendance.StudentID_id, attendance.Date) for attendance in instances})
+
+@receiver(bulk_written, sender=Module)
+def invalidate_bulk_module_plans(sender, instances, **kwargs):
+    chapter_ids = {module.ChapterID_id for module in instances}
+    invalidate_syllabus_plans(Chapter.objects.filter(pk__in=chapter_ids).values_list('SyllabusID', flat=True))
+
+@receiver(bulk_written, sender=Chapter)
+def invalidate_bulk_chapter_plans(sender, instances, **kwargs):
+    invalidate_syllabus_plans({chapter.SyllabusID_id for chapter in instances})
+
+@receiver(bulk_written, sender=TimeTable)
+def invalidate_bulk_timetable_plans(sender, instances, **kwargs):
+    slots = Q()
+    for slot in {(timetable.ClassroomID_id, timetable.SubjectID_id) for timetable in instances}:
+        slots |= Q(ClassroomID=slot[0], SubjectID=slot[1])
+    if slots:
+        invalidate_syllabus_plans(Syllabus.objects.filter(slots).values_list('SyllabusID', flat=True))
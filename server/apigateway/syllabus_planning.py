@@ -1,57 +1,214 @@
+from bisect import bisect_left
+from collections import defaultdict
 from datetime import timedelta, date
-from .models import TimeTable, Module, Chapter
+from threading import Lock
+from .models import TimeTable, Module, Chapter, Syllabus, SyllabusPlan
 
-def get_module_completion_map():
-    modules = Module.objects.all().order_by('-ThisWeek', 'ModuleID')
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
-    # Keep all modules (even RemainingTime = 0)
-    modules_for_calculation = modules.filter(RemainingTime__gt=0).order_by('-ThisWeek', 'ModuleID')
 
-    last_completion_date = date.today()  # Start from today
+class TeachingCalendar:
+    """
+    Weekly teaching-slot calendar of one syllabus, anchored at a start date.
+    Every timetable slot is one teaching hour, so "N hours after the start date"
+    becomes a lookup over the cumulative slot counts of a single week.
+    """
 
-    if modules.exists():
-        timetable_slots = TimeTable.objects.filter(
-            SubjectID=modules.first().ChapterID.SyllabusID.SubjectID
-        ).order_by('Day', 'Slot')
+    def __init__(self, slots_per_weekday, start_date):
+        self.start_date = start_date
+        # cumulative[k] -> teaching hours in the k+1 days following start_date
+        self.cumulative = []
+        total = 0
+        for offset in range(1, 8):
+            weekday = (start_date + timedelta(days=offset)).weekday()
+            total += slots_per_weekday.get(weekday, 0)
+            self.cumulative.append(total)
+        self.hours_per_week = total
 
-        unique_days = sorted(set(slot.Day for slot in timetable_slots),
-            key=lambda d: ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"].index(d)
-        )
-    else:
-        unique_days = []
+    def date_after(self, hours):
+        """Date on which the given number of teaching hours after start_date is reached."""
+        if hours <= 0:
+            return self.start_date
+        if not self.hours_per_week:
+            return None  # No timetable slots, the syllabus can never progress
+        weeks, remainder = divmod(hours - 1, self.hours_per_week)
+        day_index = bisect_left(self.cumulative, remainder + 1)
+        return self.start_date + timedelta(days=weeks * 7 + day_index + 1)
 
-    module_completion_map = {}
 
-    for module in modules_for_calculation:
-        estimated_completion = last_completion_date
-        remaining_hours = module.RemainingTime
-
-        while remaining_hours > 0:
-            estimated_completion += timedelta(days=1)
-            if estimated_completion.strftime('%A') in unique_days:
-                remaining_hours -= 1  # Deduct 1 hour per teaching day
-        
-        last_completion_date = estimated_completion  # Update last completion date
-        module_completion_map[module.ModuleID] = estimated_completion
+def get_teaching_calendars(syllabus_keys, start_date=None):
+    """
+    Build a TeachingCalendar for every (SyllabusID, ClassroomID, SubjectID) in syllabus_keys
+    from a single grouped timetable query.
+    """
+    start_date = start_date or date.today()
+    classroom_ids = {classroom_id for _, classroom_id, _ in syllabus_keys}
+    subject_ids = {subject_id for _, _, subject_id in syllabus_keys}
+
+    slot_counts = defaultdict(dict)
+    timetable_slots = TimeTable.objects.filter(
+        ClassroomID__in=classroom_ids, SubjectID__in=subject_ids
+    ).values_list('ClassroomID', 'SubjectID', 'Day')
+    for classroom_id, subject_id, day in timetable_slots:
+        if day not in WEEKDAYS:
+            continue
+        weekday_counts = slot_counts[(classroom_id, subject_id)]
+        weekday = WEEKDAYS.index(day)
+        weekday_counts[weekday] = weekday_counts.get(weekday, 0) + 1
+
+    return {
+        syllabus_id: TeachingCalendar(slot_counts.get((classroom_id, subject_id), {}), start_date)
+        for syllabus_id, classroom_id, subject_id in syllabus_keys
+    }
+
+
+def plan_syllabus_modules(syllabus_ids=None, start_date=None):
+    """
+    Plan module completion dates independently for each syllabus.
+
+    Modules of a syllabus are taught one after another ('-ThisWeek', 'ModuleID' order),
+    so each completion date is the calendar date on which the running total of
+    RemainingTime hours is reached. Returns {SyllabusID: {ModuleID: date}}.
+    Modules of syllabi without any timetable slot are left out.
+    """
+    modules = Module.objects.filter(RemainingTime__gt=0)
+    if syllabus_ids is not None:
+        modules = modules.filter(ChapterID__SyllabusID__in=syllabus_ids)
+    modules = modules.order_by('-ThisWeek', 'ModuleID').values_list(
+        'ModuleID',
+        'RemainingTime',
+        'ChapterID__SyllabusID',
+        'ChapterID__SyllabusID__ClassroomID',
+        'ChapterID__SyllabusID__SubjectID',
+    )
+
+    modules_by_syllabus = defaultdict(list)
+    syllabus_keys = set()
+    for module_id, remaining_time, syllabus_id, classroom_id, subject_id in modules:
+        modules_by_syllabus[syllabus_id].append((module_id, remaining_time))
+        syllabus_keys.add((syllabus_id, classroom_id, subject_id))
+
+    calendars = get_teaching_calendars(syllabus_keys, start_date)
+
+    plans = {}
+    for syllabus_id, syllabus_modules in modules_by_syllabus.items():
+        calendar = calendars[syllabus_id]
+        plan = {}
+        hours_taught = 0
+        for module_id, remaining_time in syllabus_modules:
+            hours_taught += remaining_time
+            completion = calendar.date_after(hours_taught)
+            if completion is not None:
+                plan[module_id] = completion
+        plans[syllabus_id] = plan
+    return plans
+
+
+# Hit/miss counters of the persisted SyllabusPlan cache (per syllabus lookup, per process)
+_plan_cache_lock = Lock()
+_plan_cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_plan_cache_stats():
+    with _plan_cache_lock:
+        return dict(_plan_cache_stats)
+
+
+def _count_plan_lookups(hits, misses):
+    with _plan_cache_lock:
+        _plan_cache_stats["hits"] += hits
+        _plan_cache_stats["misses"] += misses
+
+
+def store_syllabus_plans(plans, planned_on):
+    """Upsert {SyllabusID: {ModuleID: date}} into the SyllabusPlan table in one statement."""
+    SyllabusPlan.objects.bulk_create(
+        [
+            SyllabusPlan(
+                SyllabusID_id=syllabus_id,
+                PlannedOn=planned_on,
+                ModuleDates={module_id: completion.isoformat() for module_id, completion in plan.items()},
+            )
+            for syllabus_id, plan in plans.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['SyllabusID'],
+        update_fields=['PlannedOn', 'ModuleDates'],
+    )
+
+
+def rebuild_syllabus_plans(syllabus_ids=None):
+    """Recompute and store the plans of the given syllabi (all syllabi by default)."""
+    syllabi = Syllabus.objects.all()
+    if syllabus_ids is not None:
+        syllabi = syllabi.filter(SyllabusID__in=syllabus_ids)
+    syllabus_ids = list(syllabi.values_list('SyllabusID', flat=True))
+    today = date.today()
+    plans = {syllabus_id: {} for syllabus_id in syllabus_ids}
+    plans.update(plan_syllabus_modules(syllabus_ids, today))
+    store_syllabus_plans(plans, today)
+    return plans
+
+
+def invalidate_syllabus_plans(syllabus_ids):
+    syllabus_ids = {syllabus_id for syllabus_id in syllabus_ids if syllabus_id}
+    if syllabus_ids:
+        SyllabusPlan.objects.filter(SyllabusID__in=syllabus_ids).delete()
+
+
+def get_syllabus_plans(syllabus_ids=None):
+    """
+    Completion plans {SyllabusID: {ModuleID: date}} served from the SyllabusPlan table.
+    Plans missing (invalidated by a Module/Chapter/TimeTable write) or computed on an
+    earlier day are recomputed for those syllabi only and stored back.
+    """
+    today = date.today()
+    if syllabus_ids is None:
+        syllabus_ids = Syllabus.objects.values_list('SyllabusID', flat=True)
+    syllabus_ids = set(syllabus_ids)
+
+    stored = SyllabusPlan.objects.filter(SyllabusID__in=syllabus_ids, PlannedOn=today) \
+        .values_list('SyllabusID', 'ModuleDates')
+    plans = {
+        syllabus_id: {module_id: date.fromisoformat(completion) for module_id, completion in module_dates.items()}
+        for syllabus_id, module_dates in stored
+    }
+
+    missing_ids = syllabus_ids - plans.keys()
+    _count_plan_lookups(hits=len(plans), misses=len(missing_ids))
+    if missing_ids:
+        plans.update(rebuild_syllabus_plans(missing_ids))
+    return plans
+
+
+def get_module_completion_map(syllabus_ids=None):
+    module_completion_map = {}
+    for plan in get_syllabus_plans(syllabus_ids).values():
+        module_completion_map.update(plan)
     return module_completion_map
 
-def get_chapter_completion_map():
-    module_completion_map = get_module_completion_map()
+def get_chapter_completion_map(syllabus_ids=None):
+    """
+    Latest module completion date per chapter, {ChapterID: date or None}.
+    Runs a fixed number of queries however many chapters are involved.
+    """
+    module_completion_map = get_module_completion_map(syllabus_ids)
 
     chapters = Chapter.objects.all()
-    chapter_completion_map = {}
-
-    for chapter in chapters:
-        # Get all module completion dates for this chapter
-        module_dates = [
-            module_completion_map[module.ModuleID] 
-            for module in Module.objects.filter(ChapterID=chapter.ChapterID)
-        ]
-
-        # If there are modules, take the latest completion date as the chapter completion date
-        if module_dates:
-            chapter_completion_map[chapter.ChapterID] = max(module_dates)
-        else:
-            chapter_completion_map[chapter.ChapterID] = None  # No modules, no completion date
-
-    return chapter_completion_map
\ No newline at end of file
+    modules = Module.objects.all()
+    if syllabus_ids is not None:
+        chapters = chapters.filter(SyllabusID__in=syllabus_ids)
+        modules = modules.filter(ChapterID__SyllabusID__in=syllabus_ids)
+
+    # Chapters without planned modules have no completion date
+    chapter_completion_map = dict.fromkeys(chapters.values_list('ChapterID', flat=True))
+
+    for module_id, chapter_id in modules.values_list('ModuleID', 'ChapterID'):
+        completion = module_completion_map.get(module_id)
+        if completion is None:
+            continue
+        latest = chapter_completion_map.get(chapter_id)
+        if latest is None or completion > latest:
+            chapter_completion_map[chapter_id] = completion
+
+    return chapter_completion_map
@@ -1,3 +1,472 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from .models import Subject, Teacher, Classroom, Student, Attendance, TimeTable, Syllabus, Chapter, Module, Exam, Marks, \
+                    StudentAttendanceMonth, ClassroomAttendanceDay, SyllabusPlan
+from .pagination import encode_cursor
+from .syllabus_planning import TeachingCalendar
 
-# Create your tests here.
+
+def create_syllabus(classroom_id="7A", subject_id="Mathematics"):
+    subject, _ = Subject.objects.get_or_create(SubjectID=subject_id)
+    teacher, _ = Teacher.objects.get_or_create(
+        TeacherID=f"T_{classroom_id}_{subject_id}",
+        defaults={"Name": "Teacher", "DateofJoining": date(2024, 6, 1),
+                  "Phone": f"{classroom_id}{subject_id}"[:15], "SubjectID": subject},
+    )
+    classroom, created = Classroom.objects.get_or_create(ClassroomID=classroom_id)
+    if created:
+        for slot, day in enumerate(["Monday", "Wednesday", "Friday"], start=1):
+            TimeTable.objects.create(ClassroomID=classroom, Day=day, Slot=slot, SubjectID=subject)
+    return Syllabus.objects.create(ClassroomID=classroom, SubjectID=subject, TeacherID=teacher)
+
+
+def create_chapters(syllabus, count, modules_per_chapter=3):
+    for c in range(count):
+        chapter = Chapter.objects.create(
+            ChapterID=f"{syllabus.SyllabusID}_CH{c:03}", SyllabusID=syllabus,
+            ChapterName=f"Chapter {c}", TargetDate=date(2025, 3, 1),
+        )
+        for m in range(modules_per_chapter):
+            Module.objects.create(
+                ModuleID=f"{chapter.ChapterID}_M{m}", ChapterID=chapter,
+                ModuleName=f"Module {m}", RemainingTime=2,
+            )
+
+
+def create_students(classroom, count):
+    return [
+        Student.objects.create(
+            StudentID=f"{classroom.ClassroomID}_S{s:03}", Name=f"Student {s}", DateofJoining=date(2024, 6, 1),
+            ClassroomID=classroom, GuardianName="Guardian", GuardianRelation="Parent",
+            GuardianPhone="0000000000", Email=f"{classroom.ClassroomID}_s{s}@school.test",
+        )
+        for s in range(count)
+    ]
+
+
+class TeachingCalendarTests(SimpleTestCase):
+    monday = date(2025, 1, 6)
+
+    def walk_days(self, slots_per_weekday, start_date, hours):
+        """The day-by-day loop date_after() replaces."""
+        day, taught = start_date, 0
+        while taught < hours:
+            day += timedelta(days=1)
+            taught += slots_per_weekday.get(day.weekday(), 0)
+        return day
+
+    def test_several_slots_per_day(self):
+        slots = {1: 2, 3: 1}  # Two hours on Tuesday, one on Thursday
+        calendar = TeachingCalendar(slots, self.monday)
+        self.assertEqual(calendar.date_after(0), self.monday)
+        self.assertEqual(calendar.date_after(1), date(2025, 1, 7))
+        self.assertEqual(calendar.date_after(2), date(2025, 1, 7))
+        self.assertEqual(calendar.date_after(3), date(2025, 1, 9))
+
+    def test_wraps_past_a_week(self):
+        slots = {1: 2, 3: 1}
+        calendar = TeachingCalendar(slots, self.monday)
+        self.assertEqual(calendar.date_after(4), date(2025, 1, 14))
+        self.assertEqual(calendar.date_after(6), date(2025, 1, 16))
+        self.assertEqual(calendar.date_after(7), date(2025, 1, 21))
+        for hours in range(1, 40):
+            self.assertEqual(calendar.date_after(hours), self.walk_days(slots, self.monday, hours))
+
+    def test_start_day_without_slots(self):
+        saturday = date(2025, 1, 11)
+        self.assertEqual(TeachingCalendar({0: 1}, saturday).date_after(1), date(2025, 1, 13))
+        # The start date itself is never taught, even when it has slots
+        self.assertEqual(TeachingCalendar({0: 1}, self.monday).date_after(1), date(2025, 1, 13))
+        for start in (saturday, self.monday, date(2025, 1, 12)):
+            for hours in range(1, 10):
+                self.assertEqual(TeachingCalendar({0: 1, 4: 3}, start).date_after(hours),
+                                 self.walk_days({0: 1, 4: 3}, start, hours))
+
+    def test_no_timetable(self):
+        calendar = TeachingCalendar({}, self.monday)
+        self.assertIsNone(calendar.date_after(1))
+        self.assertEqual(calendar.date_after(0), self.monday)
+
+
+class ChapterListQueryCountTests(TestCase):
+    def chapter_list_queries(self, chapter_count):
+        Syllabus.objects.all().delete()
+        syllabus = create_syllabus()
+        create_chapters(syllabus, chapter_count)
+        create_chapters(create_syllabus("7B"), 5)  # Must not be planned for a 7A request
+
+        with self.assertNumQueries(8) as cold:
+            response = self.client.get("/chapters/", {"SyllabusID": syllabus.SyllabusID})
+        self.assertEqual(len(response.json()), chapter_count)
+        self.assertTrue(all(chapter["estimated_completion_date"] for chapter in response.json()))
+        return len(cold.captured_queries)
+
+    def test_query_count_independent_of_chapter_count(self):
+        self.assertEqual(self.chapter_list_queries(2), self.chapter_list_queries(25))
+
+    def test_cached_plan_is_reused(self):
+        syllabus = create_syllabus()
+        create_chapters(syllabus, 10)
+        self.client.get("/chapters/", {"SyllabusID": syllabus.SyllabusID})
+
+        # Stored plan lookup, chapters, modules and the chapter rows of the response
+        with self.assertNumQueries(4):
+            self.client.get("/chapters/", {"SyllabusID": syllabus.SyllabusID})
+
+
+    def test_page_plans_only_its_syllabi(self):
+        create_chapters(create_syllabus(), 5)
+        create_chapters(create_syllabus("7B"), 5)
+
+        response = self.client.get("/chapters/", {"limit": 3})
+        self.assertEqual({chapter["SyllabusID"] for chapter in response.json()["results"]}, {"7A_Mathematics"})
+        self.assertEqual(list(SyllabusPlan.objects.values_list("SyllabusID", flat=True)), ["7A_Mathematics"])
+
+
+class SyllabusPlanInvalidationTests(TestCase):
+    def setUp(self):
+        self.syllabus = create_syllabus()
+        create_chapters(self.syllabus, 2)
+        create_chapters(create_syllabus("7B"), 1)
+
+    def served_dates(self, syllabus_id="7A_Mathematics"):
+        response = self.client.get("/chapters/", {"SyllabusID": syllabus_id})
+        return {chapter["ChapterID"]: chapter["estimated_completion_date"] for chapter in response.json()}
+
+    def assertPlanDropped(self, *syllabus_ids):
+        self.assertFalse(SyllabusPlan.objects.filter(SyllabusID__in=syllabus_ids).exists())
+
+    def test_module_remaining_time_edit(self):
+        before = self.served_dates()
+        module = Module.objects.get(ModuleID="7A_Mathematics_CH000_M0")
+        module.RemainingTime = 20
+        module.save()
+
+        self.assertPlanDropped("7A_Mathematics")
+        after = self.served_dates()
+        self.assertGreater(after["7A_Mathematics_CH000"], before["7A_Mathematics_CH000"])
+        self.assertGreater(after["7A_Mathematics_CH001"], before["7A_Mathematics_CH001"])
+
+    def test_chapter_moved_to_another_syllabus(self):
+        before = self.served_dates()
+        self.served_dates("7B_Mathematics")
+        chapter = Chapter.objects.get(ChapterID="7A_Mathematics_CH000")
+        chapter.SyllabusID = Syllabus.objects.get(SyllabusID="7B_Mathematics")
+        chapter.save()
+
+        self.assertPlanDropped("7A_Mathematics", "7B_Mathematics")
+        after = self.served_dates()
+        self.assertEqual(list(after), ["7A_Mathematics_CH001"])
+        self.assertLess(after["7A_Mathematics_CH001"], before["7A_Mathematics_CH001"])
+        self.assertIn("7A_Mathematics_CH000", self.served_dates("7B_Mathematics"))
+
+    def test_timetable_slot_added_and_deleted(self):
+        before = self.served_dates()
+        slot = TimeTable.objects.create(ClassroomID_id="7A", Day="Tuesday", Slot=4, SubjectID_id="Mathematics")
+
+        self.assertPlanDropped("7A_Mathematics")
+        with_slot = self.served_dates()
+        self.assertLess(with_slot["7A_Mathematics_CH001"], before["7A_Mathematics_CH001"])
+
+        slot.delete()
+        self.assertPlanDropped("7A_Mathematics")
+        self.assertEqual(self.served_dates(), before)
+
+
+class CatalogTests(TestCase):
+    def test_ids_and_names_in_one_query_per_model(self):
+        syllabus = create_syllabus()
+        create_chapters(syllabus, 2, modules_per_chapter=1)
+        create_students(syllabus.ClassroomID, 2)
+
+        with self.assertNumQueries(8):
+            catalog = self.client.get("/catalog/").json()
+        self.assertEqual(catalog["ClassroomID"], {"7A": []})
+        self.assertEqual(catalog["StudentID"], {"7A_S000": ["Student 0"], "7A_S001": ["Student 1"]})
+        self.assertEqual(catalog["ModuleID"]["7A_Mathematics_CH001_M0"], ["Module 0"])
+        self.assertEqual(catalog["SyllabusID"], {"7A_Mathematics": []})
+
+
+class ModuleListQueryTests(TestCase):
+    def test_chapter_filter_runs_in_database(self):
+        syllabus = create_syllabus()
+        create_chapters(syllabus, 3)
+        create_chapters(create_syllabus("7B"), 3)
+        self.client.get("/modules/", {"ChapterID": "7A_Mathematics_CH001"})
+
+        # Filtered modules joined with their chapter, then the stored 7A_Mathematics plan
+        with self.assertNumQueries(2):
+            response = self.client.get("/modules/", {"ChapterID": "7A_Mathematics_CH001"})
+        modules = response.json()
+        self.assertEqual([module["ModuleID"] for module in modules],
+                         [f"7A_Mathematics_CH001_M{m}" for m in range(3)])
+        self.assertEqual({module["ChapterID"] for module in modules}, {"7A_Mathematics_CH001"})
+
+
+class ExamListQueryTests(TestCase):
+    def setUp(self):
+        syllabus = create_syllabus()
+        create_chapters(syllabus, 4, modules_per_chapter=0)
+        chapters = list(Chapter.objects.order_by('ChapterID'))
+        students = create_students(syllabus.ClassroomID, 5)
+        for e in range(6):
+            exam = Exam.objects.create(
+                ExamID=f"E{e}", ExamName=f"Exam {e}", DateOfExam=date(2025, 1, 1 + e), SyllabusID=syllabus,
+            )
+            exam.Chapters.set(chapters[:2] if e % 2 else chapters)
+            for s, student in enumerate(students):
+                Marks.objects.create(MarksID=f"E{e}_S{s}", StudentID=student, ExamID=exam, Marks=50 + s * 10)
+
+    def test_bounded_queries_and_scoped_marks(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/exams/", {"ChapterID": ["7A_Mathematics_CH000", "7A_Mathematics_CH001"]})
+        exams = response.json()
+        self.assertEqual(len(exams), 6)  # One row per exam even when several chapters match
+
+        with self.assertNumQueries(3):
+            response = self.client.get("/exams/", {"ChapterID": "7A_Mathematics_CH003"})
+        exams = response.json()
+        self.assertEqual(sorted(exam["ExamID"] for exam in exams), ["E0", "E2", "E4"])
+        for exam in exams:
+            self.assertEqual((exam["AverageMarks"], exam["HighestMarks"], exam["LowestMarks"]), (70, 90, 50))
+            self.assertEqual(len(exam["AllMarks"]), 5)
+            self.assertEqual(len(exam["Chapters"]), 4)
+
+
+class ListPaginationTests(TestCase):
+    def setUp(self):
+        classroom = Classroom.objects.create(ClassroomID="7A")
+        for student in create_students(classroom, 3):
+            for day in range(1, 6):
+                Attendance.objects.create(StudentID=student, Date=date(2025, 2, day), Status=day % 2)
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get("/attendance/")
+        self.assertEqual(len(response.json()), 15)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        rows, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 4, "fields": "Date,StudentID"}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.client.get("/attendance/", params).json()
+            rows += page["results"]
+            cursor, pages = page["next_cursor"], pages + 1
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 4)
+        self.assertEqual(len({(row["Date"], row["StudentID"]) for row in rows}), 15)
+        self.assertEqual([row["Date"] for row in rows], sorted(row["Date"] for row in rows))
+        self.assertEqual(set(rows[0]), {"Date", "StudentID"})
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/students/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+        for values in (["abc", 1], ["2025-01-01", "x"], [{"a": 1}, 1], [None, 1], ["2025-02-30", 1]):
+            response = self.client.get("/attendance/", {"limit": 4, "cursor": encode_cursor(values)})
+            self.assertEqual(response.status_code, 400, values)
+            self.assertEqual(response.json(), {"error": "Invalid cursor"})
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        classroom = Classroom.objects.create(ClassroomID="7A")
+        for student in create_students(classroom, 2):
+            for day in range(1, 4):
+                Attendance.objects.create(StudentID=student, Date=date(2025, 2, day), Status=1)
+
+    def test_csv_export(self):
+        response = self.client.get("/attendance/", {"format": "csv", "fields": "StudentID,Date,Status"})
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "StudentID,Date,Status")
+        self.assertEqual(lines[1], "7A_S000,2025-02-01,1")
+        self.assertEqual(len(lines), 7)
+
+    def test_ndjson_export(self):
+        response = self.client.get("/attendance/", {"ClassroomID": "7A"}, HTTP_ACCEPT="application/x-ndjson")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(set(rows[0]), {"AttendanceID", "StudentID", "Date", "Status"})
+
+
+class ClassroomAttendanceTests(TestCase):
+    def setUp(self):
+        classroom = Classroom.objects.create(ClassroomID="7A")
+        other = Classroom.objects.create(ClassroomID="7B")
+        self.students = create_students(classroom, 3)
+        create_students(other, 1)
+        for s, student in enumerate(self.students):
+            for day in range(1, 5):
+                if (s, day) != (2, 4):  # Student 2 has no record on the 4th
+                    Attendance.objects.create(StudentID=student, Date=date(2025, 2, day), Status=int(day != s + 1))
+        Attendance.objects.create(StudentID=self.students[0], Date=date(2024, 6, 1), Status=1)  # Outside the default window
+        Attendance.objects.create(StudentID=Student.objects.get(StudentID="7B_S000"), Date=date(2025, 2, 1), Status=1)
+
+    def test_default_window_and_join(self):
+        with self.assertNumQueries(2):  # Latest recorded date, then the joined attendance rows
+            rows = self.client.get("/attendance/", {"ClassroomID": "7A"}).json()
+        self.assertEqual(len(rows), 11)
+        self.assertTrue(all(row["StudentID"].startswith("7A_") for row in rows))
+
+    def test_register_grid(self):
+        with self.assertNumQueries(4):
+            grid = self.client.get("/attendance/", {"ClassroomID": "7A", "View": "grid"}).json()
+        self.assertEqual(grid["Dates"], ["2025-02-01", "2025-02-02", "2025-02-03", "2025-02-04"])
+        self.assertEqual([student["Statuses"] for student in grid["Students"]],
+                         [[0, 1, 1, 1], [1, 0, 1, 1], [1, 1, 0, None]])
+        self.assertEqual([student["DaysPresent"] for student in grid["Students"]], [3, 3, 2])
+        self.assertEqual([student["TotalDays"] for student in grid["Students"]], [4, 4, 3])
+        self.assertEqual(grid["Daily"][3], {"Date": "2025-02-04", "Present": 2, "Total": 2})
+        self.assertFalse(grid["Truncated"])
+
+    def test_export_ignores_default_window(self):
+        response = self.client.get("/attendance/", {"ClassroomID": "7A", "format": "ndjson"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 12)  # Includes the record outside the default window
+
+    def test_long_register_grid_is_clamped(self):
+        with mock.patch("apigateway.attendance_reports.REGISTER_GRID_MAX_DATES", 3):
+            grid = self.client.get("/attendance/", {"ClassroomID": "7A", "View": "grid",
+                                                    "StartDate": "2024-01-01", "EndDate": "2025-12-31"}).json()
+        self.assertTrue(grid["Truncated"])
+        self.assertEqual(grid["Dates"], ["2025-02-02", "2025-02-03", "2025-02-04"])
+        self.assertEqual((grid["StartDate"], grid["EarlierEndDate"]), ("2025-02-02", "2025-02-01"))
+        self.assertEqual([student["TotalDays"] for student in grid["Students"]], [3, 3, 2])
+
+    def test_invalid_dates(self):
+        for params in ({"View": "grid", "StartDate": "bad"}, {"View": "grid", "EndDate": "2025-02-30"},
+                       {"StartDate": "bad"}):
+            response = self.client.get("/attendance/", {"ClassroomID": "7A", **params})
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("Invalid date", response.json()["error"])
+
+
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        classroom = Classroom.objects.create(ClassroomID="7A")
+        self.student, self.other = create_students(classroom, 2)
+        # Student: present Jan 30 - Feb 3, absent Feb 4 - 6, present Feb 7
+        statuses = [1, 1, 1, 1, 1, 0, 0, 0, 1]
+        for offset, attendance_status in enumerate(statuses):
+            Attendance.objects.create(StudentID=self.student, Date=date(2025, 1, 30 + offset) if offset < 2
+                                      else date(2025, 2, offset - 1), Status=attendance_status)
+        Attendance.objects.create(StudentID=self.other, Date=date(2025, 2, 1), Status=0)
+
+    def student_summary(self, **params):
+        return self.client.get("/attendance/summary/", {"StudentID": self.student.StudentID, **params}).json()["Students"][0]
+
+    def test_summary_from_rollups(self):
+        with self.assertNumQueries(1):
+            summary = self.student_summary()
+        self.assertEqual((summary["DaysPresent"], summary["DaysRecorded"]), (6, 9))
+        self.assertEqual(summary["CurrentStreak"], {"Status": "Present", "Days": 1})
+        self.assertEqual(summary["LongestAbsence"], 3)
+        self.assertTrue(summary["ChronicAbsence"])
+
+        summary = self.student_summary(StartDate="2025-01-31", EndDate="2025-02-04")
+        self.assertEqual((summary["DaysPresent"], summary["DaysRecorded"]), (4, 5))
+
+    def test_rollups_follow_writes(self):
+        record = Attendance.objects.get(StudentID=self.student, Date=date(2025, 2, 5))
+        record.Status = 1
+        record.save()
+        self.assertEqual(self.student_summary()["LongestAbsence"], 1)
+
+        record.Date = date(2025, 3, 1)
+        record.save()
+        self.assertEqual(StudentAttendanceMonth.objects.get(StudentID=self.student, Month=date(2025, 3, 1)).DaysPresent, 1)
+        self.assertFalse(ClassroomAttendanceDay.objects.filter(Date=date(2025, 2, 5)).exists())
+
+        classroom = self.client.get("/attendance/summary/", {"ClassroomID": "7A"}).json()
+        self.assertEqual(classroom["ChronicAbsentees"], [self.student.StudentID, self.other.StudentID])
+        self.assertEqual(classroom["Classroom"]["Daily"][2], {"Date": "2025-02-01", "Present": 1, "Total": 2})
+
+        self.other.delete()
+        self.assertEqual(ClassroomAttendanceDay.objects.get(Date=date(2025, 2, 1)).Total, 1)
+
+    def test_moving_a_student_refreshes_both_classrooms(self):
+        Classroom.objects.create(ClassroomID="7B")
+        self.other.ClassroomID_id = "7B"
+        self.other.save()
+        self.assertEqual(ClassroomAttendanceDay.objects.get(ClassroomID="7A", Date=date(2025, 2, 1)).Total, 1)
+        self.assertEqual(ClassroomAttendanceDay.objects.get(ClassroomID="7B", Date=date(2025, 2, 1)).Total, 1)
+
+    def test_rebuild_matches_incremental(self):
+        incremental = list(StudentAttendanceMonth.objects.order_by('StudentID', 'Month').values_list(
+            'StudentID', 'Month', 'PresentDays', 'RecordedDays', 'DaysPresent', 'DaysRecorded'))
+        daily = list(ClassroomAttendanceDay.objects.order_by('Date').values_list('ClassroomID', 'Date', 'Present', 'Total'))
+        call_command("rebuild_attendance_rollups", stdout=StringIO())
+        self.assertEqual(incremental, list(StudentAttendanceMonth.objects.order_by('StudentID', 'Month').values_list(
+            'StudentID', 'Month', 'PresentDays', 'RecordedDays', 'DaysPresent', 'DaysRecorded')))
+        self.assertEqual(daily, list(ClassroomAttendanceDay.objects.order_by('Date').values_list(
+            'ClassroomID', 'Date', 'Present', 'Total')))
+
+
+class BulkWriteTests(TestCase):
+    def setUp(self):
+        classroom = Classroom.objects.create(ClassroomID="7A")
+        self.students = create_students(classroom, 50)
+
+    def post(self, url, data, **params):
+        query = "&".join(f"{key}={value}" for key, value in {"Bulk": "true", **params}.items())
+        return self.client.post(f"{url}?{query}", data, content_type="application/json")
+
+    def test_attendance_upsert_in_constant_queries(self):
+        records = [{"StudentID": student.StudentID, "Date": "2025-02-03", "Status": 1} for student in self.students]
+        with self.assertNumQueries(9):  # FK lookup, upsert, then the rollup refresh of the batch
+            response = self.post("/attendance/", records)
+        self.assertEqual(response.json(), {"written": 50, "errors": []})
+
+        records[0]["Status"] = 0
+        self.assertEqual(self.post("/attendance/", records).status_code, 201)
+        self.assertEqual(Attendance.objects.count(), 50)
+        self.assertEqual(Attendance.objects.get(StudentID=self.students[0]).Status, 0)
+        self.assertEqual(ClassroomAttendanceDay.objects.get(Date=date(2025, 2, 3)).Present, 49)
+
+    def test_per_row_errors(self):
+        rows = [
+            {"StudentID": "7A_S000", "Name": "Again", "DateofJoining": "2024-06-01", "ClassroomID": "7A",
+             "GuardianName": "G", "GuardianRelation": "Parent", "GuardianPhone": "1", "Email": "new@school.test"},
+            {"StudentID": "7A_S100", "Name": "New", "DateofJoining": "2024-06-01", "ClassroomID": "9Z",
+             "GuardianName": "G", "GuardianRelation": "Parent", "GuardianPhone": "1", "Email": "other@school.test"},
+            {"StudentID": "7A_S101", "Name": "Valid", "DateofJoining": "2024-06-01", "ClassroomID": "7A",
+             "GuardianName": "G", "GuardianRelation": "Parent", "GuardianPhone": "1", "Email": "valid@school.test"},
+            {"StudentID": "7A_S102", "Name": "Bad date", "DateofJoining": "someday", "ClassroomID": "7A",
+             "GuardianName": "G", "GuardianRelation": "Parent", "GuardianPhone": "1", "Email": "late@school.test"},
+            {"StudentID": "7A_S103", "Name": "Taken", "DateofJoining": "2024-06-01", "ClassroomID": "7A",
+             "GuardianName": "G", "GuardianRelation": "Parent", "GuardianPhone": "1", "Email": "7A_s1@school.test"},
+        ]
+        response = self.post("/students/", rows)
+        self.assertEqual(response.status_code, 400)
+        errors = {error["index"]: set(error["errors"]) for error in response.json()["errors"]}
+        self.assertEqual(errors, {0: {"StudentID"}, 1: {"ClassroomID"}, 3: {"DateofJoining"}, 4: {"Email"}})
+        self.assertFalse(Student.objects.filter(StudentID="7A_S101").exists())
+
+        response = self.post("/students/", rows, Partial="true")
+        self.assertEqual(response.json()["written"], 1)
+        self.assertTrue(Student.objects.filter(StudentID="7A_S101").exists())
+
+    def test_attendance_upsert_is_idempotent(self):
+        records = [{"StudentID": student.StudentID, "Date": "2025-02-04", "Status": 1} for student in self.students[:3]]
+        upsert = lambda rows: self.client.post("/attendance/upsert/", rows, content_type="application/json").json()
+
+        self.assertEqual(upsert(records)["inserted"], 3)
+        with self.assertNumQueries(2):  # FK lookup and the stored rows, nothing is written
+            result = upsert(records)
+        self.assertEqual((result["inserted"], result["updated"], result["unchanged"]), (0, 0, 3))
+
+        records[1]["Status"] = 0
+        records.append({"StudentID": self.students[3].StudentID, "Date": "2025-02-04", "Status": 1})
+        result = upsert(records)
+        self.assertEqual(result["results"], ["unchanged", "updated", "unchanged", "inserted"])
+        self.assertEqual(ClassroomAttendanceDay.objects.get(Date=date(2025, 2, 4)).Present, 3)
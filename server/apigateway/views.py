@@ -1,13 +1,19 @@
-from django.db.models import Count, Avg, Min, Max
+from django.db.models import Count, Avg, Min, Max, Prefetch
 from .models import  LoginInfo,Subject,Teacher,Classroom,Student,Attendance,TimeTable,Syllabus,Chapter,Module,Exam,Marks
 from .serializers import  LoginInfoSerializer,SubjectSerializer,TeacherSerializer,ClassroomSerializer, \
                           StudentSerializer,AttendanceSerializer,TimeTableSerializer,SyllabusSerializer, \
                           ChapterSerializer,ModuleSerializer,ExamSerializer,MarksSerializer
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework import status
 from datetime import date, timedelta
-from apigateway.syllabus_planning import get_module_completion_map, get_chapter_completion_map
+from apigateway.syllabus_planning import get_module_completion_map, get_chapter_completion_map, get_plan_cache_stats
+from apigateway.pagination import list_response
+from apigateway.bulk import is_bulk_request, bulk_write, bulk_upsert
+from apigateway.exports import EXPORT_RENDERERS, is_export_request, stream_export
+from apigateway.attendance_reports import AttendanceReportError, classroom_attendance, filter_dates, register_grid, \
+                                          attendance_summary, parse_date
 from django.utils.html import format_html
 from django.core.mail import send_mail
 from django.shortcuts import get_object_or_404
@@ -24,8 +30,7 @@ def logininfo_list(request):
     """
     if request.method == 'GET':
         logininfos = LoginInfo.objects.all()
-        serializer = LoginInfoSerializer(logininfos, many=True)
-        return Response(serializer.data)
+        return list_response(request, logininfos, LoginInfoSerializer)
 
     elif request.method == 'POST':
         data = request.data
@@ -88,10 +93,12 @@ def teacher_list(request):
     """
     if request.method == 'GET':
         teachers = Teacher.objects.all()
-        serializer = TeacherSerializer(teachers, many=True)
-        return Response(serializer.data)
+        return list_response(request, teachers, TeacherSerializer)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, TeacherSerializer)
+
         if isinstance(request.data, list):
             serializer = TeacherSerializer(data=request.data, many=True)
         else:
@@ -140,10 +147,12 @@ def student_list(request):
     """
     if request.method == 'GET':
         students = Student.objects.all()
-        serializer = StudentSerializer(students, many=True)
-        return Response(serializer.data)
+        return list_response(request, students, StudentSerializer)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, StudentSerializer)
+
         if isinstance(request.data, list):  # Bulk student creation
             serializer = StudentSerializer(data=request.data, many=True)
         else:  # Single student creation
@@ -194,10 +203,12 @@ def classroom_list(request):
     """
     if request.method == 'GET':
         classrooms = Classroom.objects.all()
-        serializer = ClassroomSerializer(classrooms, many=True)
-        return Response(serializer.data)
+        return list_response(request, classrooms, ClassroomSerializer)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, ClassroomSerializer)
+
         if isinstance(request.data, list):  # Bulk creation support
             serializer = ClassroomSerializer(data=request.data, many=True)
         else:
@@ -247,10 +258,12 @@ def subject_list(request):
     """
     if request.method == 'GET':
         subjects = Subject.objects.all()
-        serializer = SubjectSerializer(subjects, many=True)
-        return Response(serializer.data)
+        return list_response(request, subjects, SubjectSerializer)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, SubjectSerializer)
+
         if isinstance(request.data, list):
             serializer = SubjectSerializer(data=request.data, many=True)
         else:
@@ -292,11 +305,17 @@ def subject_detail(request, SubjectID):
 # views for Attendance
 # 📌 URL: /attendance/
 @api_view(['GET', 'POST'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + EXPORT_RENDERERS)
 def attendance_list(request):
     """
     GET  /attendance/?StudentId=1&StartDate=2025-02-01&EndDate=2025-02-15  -> Get all attendance data (with optional filters)
     GET  /attendance/?ClassroomID=10&StartDate=2025-02-01&EndDate=2025-02-15  -> Get attendance for a class
+                                (last 30 recorded days of the class when no dates are given, except for exports)
+    GET  /attendance/?ClassroomID=10&View=grid  -> Per-student / per-day register grid of the class
+                                (latest 200 dates of a longer range, see Truncated / EarlierEndDate)
+    GET  /attendance/?format=csv (or Accept: application/x-ndjson)  -> Stream the filtered records as CSV / NDJSON
     POST /attendance/  -> Create one or multiple attendance records
+    POST /attendance/?Bulk=true  -> Upsert a list of records with one bulk statement (see apigateway/bulk.py)
     """
     print("here")
     if request.method == 'GET':
@@ -305,27 +324,35 @@ def attendance_list(request):
         start_date = request.GET.get('StartDate')
         end_date = request.GET.get('EndDate')
 
-        attendance = Attendance.objects.all()
-
-        if student_id:
-            attendance = attendance.filter(StudentID=student_id)
-        elif classroom_id:
-            # Get all students in the given classroom
-            student_ids = Student.objects.filter(ClassroomID=classroom_id).values_list('StudentID', flat=True)
-            attendance = attendance.filter(StudentID__in=student_ids)
-
-        if start_date and end_date:
-            attendance = attendance.filter(Date__range=[start_date, end_date])
-        elif start_date:
-            attendance = attendance.filter(Date__gte=start_date)
-        elif end_date:
-            attendance = attendance.filter(Date__lte=end_date)
-
-        serializer = AttendanceSerializer(attendance, many=True)
-        return Response(serializer.data)
+        try:
+            start_date, end_date = parse_date(start_date), parse_date(end_date)
+            if classroom_id and not student_id:
+                if request.GET.get('View') == 'grid':
+                    return Response(register_grid(classroom_id, start_date, end_date))
+
+                # Single join on the student's classroom, bounded to a default window unless exporting
+                attendance, _, _ = classroom_attendance(classroom_id, start_date, end_date,
+                                                        default_window=not is_export_request(request))
+            else:
+                attendance = Attendance.objects.all()
+                if student_id:
+                    attendance = attendance.filter(StudentID=student_id)
+                attendance = filter_dates(attendance, start_date, end_date)
+        except AttendanceReportError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_export_request(request):
+            attendance = attendance.order_by('Date', 'AttendanceID')
+            return stream_export(request, attendance, ['AttendanceID', 'StudentID', 'Date', 'Status'], 'attendance')
+
+        return list_response(request, attendance, AttendanceSerializer, ordering=('Date', 'AttendanceID'))
 
     elif request.method == 'POST':
         print("inside post", request.data)
+        if is_bulk_request(request):  # 📌 Upsert on (StudentID, Date) in one transaction
+            return bulk_write(request, AttendanceSerializer, conflict_fields=['StudentID', 'Date'],
+                              update_fields=['Status'])
+
         if isinstance(request.data, list):
             serializer = AttendanceSerializer(data=request.data, many=True)
         else:
@@ -337,6 +364,37 @@ def attendance_list(request):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+# 📌 URL: /attendance/upsert/
+@api_view(['POST'])
+def attendance_upsert(request):
+    """
+    POST /attendance/upsert/  -> Merge a list of {StudentID, Date, Status} on (StudentID, Date)
+    Returns {inserted, updated, unchanged, results, errors}; re-sending the same batch changes nothing,
+    so the attendance kiosk can flush often and retry. ?Partial=true writes the valid rows of a batch with errors.
+    """
+    return bulk_upsert(request, AttendanceSerializer, conflict_fields=['StudentID', 'Date'], update_fields=['Status'])
+
+# 📌 URL: /attendance/summary/
+@api_view(['GET'])
+def attendance_summary_view(request):
+    """
+    GET /attendance/summary/?StudentID=<StudentID>&StartDate=<StartDate>&EndDate=<EndDate>  -> Summary of one student
+    GET /attendance/summary/?ClassroomID=<ClassroomID>&Threshold=90  -> Per-student summaries and daily rates of a class
+    Percentage, current streak, longest absence and chronic absence (below Threshold %), served from the rollups.
+    """
+    threshold = request.GET.get('Threshold')
+    try:
+        summary = attendance_summary(
+            student_id=request.GET.get('StudentID'),
+            classroom_id=request.GET.get('ClassroomID'),
+            start_date=request.GET.get('StartDate'),
+            end_date=request.GET.get('EndDate'),
+            threshold=float(threshold) if threshold else None,
+        )
+    except (AttendanceReportError, ValueError) as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(summary)
+
 # 📌 URL: /attendance/<AttendanceID>/
 @api_view(['GET', 'PUT', 'DELETE'])
 def attendance_detail(request, AttendanceID):
@@ -387,10 +445,12 @@ def timetable_list(request):
         if slot:
             timetable = timetable.filter(Slot=slot)
 
-        serializer = TimeTableSerializer(timetable, many=True)
-        return Response(serializer.data)
+        return list_response(request, timetable, TimeTableSerializer)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, TimeTableSerializer)
+
         if isinstance(request.data, list):
             serializer = TimeTableSerializer(data=request.data, many=True)
         else:
@@ -430,6 +490,10 @@ def timetable_detail(request, TimeTableID):
         timetable.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+def set_syllabus_id(syllabus):
+    """bulk_create skips Syllabus.save(), which derives the SyllabusID"""
+    syllabus.SyllabusID = f"{syllabus.ClassroomID_id}_{syllabus.SubjectID_id}"
+
 # views for Syllabus
 # 📌 URL: /syllabus/
 @api_view(['GET', 'POST'])
@@ -452,21 +516,29 @@ def syllabus_list(request):
             filters['TeacherID'] = teacher_id
 
         syllabus = Syllabus.objects.filter(**filters)
-        serializer = SyllabusSerializer(syllabus, many=True)
-        # 📌 Get student counts for each classroom
-        classroom_counts = Student.objects.values('ClassroomID').annotate(count=Count('StudentID'))
-        student_count_map = {entry['ClassroomID']: entry['count'] for entry in classroom_counts}
-
-        # 📌 Add classroom strength to each syllabus entry
-        response_data = []
-        for entry in serializer.data:
-            classroom_id = entry["ClassroomID"]
-            entry["ClassroomStrength"] = student_count_map.get(classroom_id, 0)  # Default to 0 if no students
-            response_data.append(entry)
 
-        return Response(response_data)
+        def build(syllabus):
+            serializer = SyllabusSerializer(syllabus, many=True)
+            # 📌 Get student counts for the classrooms of these rows only
+            classroom_ids = {entry["ClassroomID"] for entry in serializer.data}
+            classroom_counts = (Student.objects.filter(ClassroomID__in=classroom_ids)
+                                .values('ClassroomID').annotate(count=Count('StudentID')))
+            student_count_map = {entry['ClassroomID']: entry['count'] for entry in classroom_counts}
+
+            # 📌 Add classroom strength to each syllabus entry
+            response_data = []
+            for entry in serializer.data:
+                classroom_id = entry["ClassroomID"]
+                entry["ClassroomStrength"] = student_count_map.get(classroom_id, 0)  # Default to 0 if no students
+                response_data.append(entry)
+            return response_data
+
+        return list_response(request, syllabus, build=build)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, SyllabusSerializer, prepare=set_syllabus_id)
+
         if isinstance(request.data, list):  # 📌 Handle bulk syllabus creation
             serializer = SyllabusSerializer(data=request.data, many=True)
         else:  # 📌 Handle single syllabus creation
@@ -504,6 +576,42 @@ def syllabus_detail(request, SyllabusID):
         syllabus.delete()
         return Response({'message': 'Syllabus entry deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
+# 📌 URL: /syllabus-plans/stats/
+@api_view(['GET'])
+def syllabus_plan_stats(request):
+    """
+    GET /syllabus-plans/stats/  -> Hit/miss counters of the cached module completion plans (this process)
+    """
+    return Response(get_plan_cache_stats())
+
+# ID / name lists of the assistant's parameter fast path (AIEngine/fast_path.py):
+# field -> (model, name column or None)
+CATALOG_FIELDS = {
+    'ClassroomID': (Classroom, None),
+    'SubjectID': (Subject, None),
+    'StudentID': (Student, 'Name'),
+    'TeacherID': (Teacher, 'Name'),
+    'SyllabusID': (Syllabus, None),
+    'ChapterID': (Chapter, 'ChapterName'),
+    'ModuleID': (Module, 'ModuleName'),
+    'ExamID': (Exam, 'ExamName'),
+}
+
+# 📌 URL: /catalog/
+@api_view(['GET'])
+def catalog(request):
+    """
+    GET /catalog/  -> {"ClassroomID": {"7A": []}, "StudentID": {"S001": ["<Name>"]}, ...}
+    IDs (and names) of every entity the assistant resolves, one values_list query per model.
+    """
+    entries = {}
+    for field, (model, name_field) in CATALOG_FIELDS.items():
+        if name_field:
+            entries[field] = {str(identifier): [name] for identifier, name in model.objects.values_list(field, name_field)}
+        else:
+            entries[field] = {str(identifier): [] for identifier in model.objects.values_list(field, flat=True)}
+    return Response(entries)
+
 # views for Chapter
 # 📌 URL: /chapters/
 @api_view(['GET', 'POST'])
@@ -519,22 +627,28 @@ def chapter_list(request):
         if syllabus_id:
             chapters = chapters.filter(SyllabusID=syllabus_id)
 
-        chapter_completion_map = get_chapter_completion_map()
+        def build(chapters):
+            chapters = list(chapters)
+            # 📌 Plan only the syllabi of these rows (a syllabus is always planned as a whole)
+            chapter_completion_map = get_chapter_completion_map({chapter.SyllabusID_id for chapter in chapters})
 
-        chapter_data = [
-            {
-                "ChapterID": chapter.ChapterID,
-                "ChapterName": chapter.ChapterName,
-                "SyllabusID": chapter.SyllabusID.SyllabusID,
-                "estimated_completion_date": chapter_completion_map.get(chapter.ChapterID),
-                "targetDate": chapter.TargetDate
-            }
-            for chapter in chapters
-        ]
+            return [
+                {
+                    "ChapterID": chapter.ChapterID,
+                    "ChapterName": chapter.ChapterName,
+                    "SyllabusID": chapter.SyllabusID_id,
+                    "estimated_completion_date": chapter_completion_map.get(chapter.ChapterID),
+                    "targetDate": chapter.TargetDate
+                }
+                for chapter in chapters
+            ]
 
-        return Response(chapter_data)
+        return list_response(request, chapters, build=build)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, ChapterSerializer)
+
         if isinstance(request.data, list):  # 📌 Handle bulk chapter creation
             serializer = ChapterSerializer(data=request.data, many=True)
         else:  # 📌 Handle single chapter creation
@@ -583,31 +697,37 @@ def module_list(request):
     chapter_id = request.GET.get('ChapterID')
 
     if request.method == 'GET':
-        modules = Module.objects.all().order_by('-ThisWeek', 'ModuleID')
-
-        # Compute completion dates
-        module_completion_map = get_module_completion_map()
+        # Joining the chapter gives the SyllabusID of every module without extra queries
+        modules = Module.objects.select_related('ChapterID').order_by('-ThisWeek', 'ModuleID')
 
-        module_data = [
-            {
-                "ModuleID": module.ModuleID,
-                "ModuleName": module.ModuleName,
-                "RemainingTime": module.RemainingTime,
-                "URL": module.URL,
-                "ThisWeek": module.ThisWeek,
-                "ChapterID": module.ChapterID.ChapterID,
-                "estimated_completion_date": module_completion_map.get(module.ModuleID, date.today())
-            }
-            for module in modules
-        ]
-
-        # Apply ChapterID filter (if given)
+        # Apply ChapterID filter (if given) in the database
         if chapter_id:
-            module_data = [module for module in module_data if module["ChapterID"] == chapter_id]
-
-        return Response(module_data)
+            modules = modules.filter(ChapterID=chapter_id)
+
+        def build(modules):
+            # Compute completion dates only for the syllabi of the listed modules
+            syllabus_ids = {module.ChapterID.SyllabusID_id for module in modules}
+            module_completion_map = get_module_completion_map(syllabus_ids) if syllabus_ids else {}
+
+            return [
+                {
+                    "ModuleID": module.ModuleID,
+                    "ModuleName": module.ModuleName,
+                    "RemainingTime": module.RemainingTime,
+                    "URL": module.URL,
+                    "ThisWeek": module.ThisWeek,
+                    "ChapterID": module.ChapterID_id,
+                    "estimated_completion_date": module_completion_map.get(module.ModuleID, date.today())
+                }
+                for module in modules
+            ]
+
+        return list_response(request, modules, ordering=('-ThisWeek', 'ModuleID'), build=build)
 
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, ModuleSerializer)
+
         if isinstance(request.data, list):  # 📌 Handle bulk module creation
             serializer = ModuleSerializer(data=request.data, many=True)
         else:  # 📌 Handle single module creation
@@ -674,50 +794,45 @@ def exam_list(request):
         if syllabus_id:
             exams = exams.filter(SyllabusID=syllabus_id)  # Filters exams by SyllabusID
         if chapter_ids:
-            exams = exams.filter(Chapters__ChapterID__in=chapter_ids)  # Filters exams by multiple ChapterIDs
-
-        serializer = ExamSerializer(exams, many=True)
-
-        # 📌 Fetch marks data for each exam
-        marks_data = Marks.objects.values('ExamID').annotate(
-            average_marks=Avg('Marks'),
-            highest_marks=Max('Marks'),
-            lowest_marks=Min('Marks')
+            # Filters exams by multiple ChapterIDs (subquery, so the marks aggregates below are not multiplied)
+            exams = exams.filter(ExamID__in=Exam.Chapters.through.objects.filter(
+                chapter_id__in=chapter_ids).values('exam_id'))
+
+        # 📌 Marks statistics, student marks and chapter names of the filtered exams only (3 queries)
+        exams = exams.annotate(
+            average_marks=Avg('marks__Marks'),
+            highest_marks=Max('marks__Marks'),
+            lowest_marks=Min('marks__Marks')
+        ).prefetch_related(
+            Prefetch('marks_set', queryset=Marks.objects.select_related('StudentID').only(
+                'ExamID', 'Marks', 'StudentID__StudentID', 'StudentID__Name')),
+            Prefetch('Chapters', queryset=Chapter.objects.only('ChapterID', 'ChapterName')),
         )
-        marks_map = {entry['ExamID']: entry for entry in marks_data}
-
-        # 📌 Fetch all student marks for each exam
-        all_marks_per_exam = {}
-        for mark in Marks.objects.select_related('StudentID', 'ExamID').all():
-            exam_id = mark.ExamID.ExamID
-            student = mark.StudentID
-
-            if exam_id not in all_marks_per_exam:
-                all_marks_per_exam[exam_id] = []
-
-            all_marks_per_exam[exam_id].append({
-                "StudentID": student.StudentID,
-                "StudentName": student.Name,
-                "Marks": mark.Marks
-            })
-
-        # 📌 Append marks data to exam response
-        response_data = []
-        for entry in serializer.data:
-            exam_id = entry["ExamID"]
-            
-            # Convert ChapterIDs to ChapterNames
-            chapters = Chapter.objects.filter(exam__ExamID=exam_id).values_list('ChapterName', flat=True)
 
-            entry["AverageMarks"] = marks_map.get(exam_id, {}).get("average_marks", None)
-            entry["HighestMarks"] = marks_map.get(exam_id, {}).get("highest_marks", None)
-            entry["LowestMarks"] = marks_map.get(exam_id, {}).get("lowest_marks", None)
-            entry["AllMarks"] = all_marks_per_exam.get(exam_id, [])
-            entry["Chapters"] = list(chapters)  # Replace ChapterIDs with ChapterNames
-
-            response_data.append(entry)
-
-        return Response(response_data)
+        def build(exams):
+            exams = list(exams)
+            serializer = ExamSerializer(exams, many=True)
+
+            # 📌 Append marks data to exam response
+            response_data = []
+            for exam, entry in zip(exams, serializer.data):
+                entry["AverageMarks"] = exam.average_marks
+                entry["HighestMarks"] = exam.highest_marks
+                entry["LowestMarks"] = exam.lowest_marks
+                entry["AllMarks"] = [
+                    {
+                        "StudentID": mark.StudentID.StudentID,
+                        "StudentName": mark.StudentID.Name,
+                        "Marks": mark.Marks
+                    }
+                    for mark in exam.marks_set.all()
+                ]
+                entry["Chapters"] = [chapter.ChapterName for chapter in exam.Chapters.all()]  # Replace ChapterIDs with ChapterNames
+
+                response_data.append(entry)
+            return response_data
+
+        return list_response(request, exams, ordering=('DateOfExam', 'ExamID'), build=build)
 
     elif request.method == 'POST':
         # Handle bulk exam creation
@@ -804,9 +919,11 @@ def exam_detail(request, ExamID):
 # views for Marks
 # 📌 URL: /marks/
 @api_view(['GET','POST'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + EXPORT_RENDERERS)
 def marks_list(request):
     """
     GET  /marks/?StudentID=<StudentID>&ExamID=<ExamID>  -> Filter Marks by student and exam.
+    GET  /marks/?format=csv (or Accept: application/x-ndjson)  -> Stream the filtered marks as CSV / NDJSON
     POST /marks/  -> Create a new Marks entry or multiple entries.
     """
     if request.method == 'GET':
@@ -822,9 +939,14 @@ def marks_list(request):
         if exam_id:
             marks = marks.filter(ExamID=exam_id)
 
-        serializer = MarksSerializer(marks, many=True)
-        return Response(serializer.data)
+        if is_export_request(request):
+            return stream_export(request, marks.order_by('MarksID'), ['MarksID', 'StudentID', 'ExamID', 'Marks'], 'marks')
+
+        return list_response(request, marks, MarksSerializer)
     elif request.method == 'POST':
+        if is_bulk_request(request):  # 📌 Single-transaction bulk_create with per-row errors
+            return bulk_write(request, MarksSerializer)
+
         if isinstance(request.data, list):  # Bulk create marks entries
             serializer = MarksSerializer(data=request.data, many=True)
         else:  # Create a single marks entry
@@ -880,11 +1002,12 @@ def send_attendance_alert(request):
     
     student = get_object_or_404(Student, StudentID=student_id)
     attendance_records = Attendance.objects.filter(StudentID=student).order_by("Date")
-    total_days = attendance_records.count()
-    days_present = attendance_records.filter(Status=1).count()
-    
-    # Calculate attendance percentage
-    attendance_percentage = (days_present / total_days * 100) if total_days > 0 else 0
+
+    # Totals and percentage from the monthly attendance rollups
+    summary = attendance_summary(student_id=student_id)["Students"]
+    total_days = summary[0]["DaysRecorded"] if summary else 0
+    days_present = summary[0]["DaysPresent"] if summary else 0
+    attendance_percentage = summary[0]["Percentage"] if summary else 0
     
     # Create attendance table
     attendance_table = """
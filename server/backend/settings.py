@@ -140,4 +140,10 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# Keyset pagination of the *_list endpoints (?limit=&cursor=&fields=, see apigateway/pagination.py)
+LIST_PAGINATION = {
+    'PAGINATE_BY_DEFAULT': False,  # True -> plain full-table lists need ?paginate=false
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+}
@@ -23,7 +23,8 @@ from apigateway.views import subject_list, subject_detail,teacher_list,teacher_d
                              timetable_detail,timetable_list,syllabus_detail,syllabus_list, \
                              chapter_list,chapter_detail,module_list,module_detail, \
                              exam_list,exam_detail,marks_list,marks_detail, send_attendance_alert, \
-                             send_syllabus_alert
+                             send_syllabus_alert, syllabus_plan_stats, attendance_summary_view, attendance_upsert, \
+                             catalog
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -46,6 +47,8 @@ urlpatterns = [
 
     # Attendance URLs
     path('attendance/', attendance_list, name='attendance-list'),  # List & Create Attendance (bulk support)
+    path('attendance/upsert/', attendance_upsert, name='attendance-upsert'),  # Idempotent batch merge (kiosk)
+    path('attendance/summary/', attendance_summary_view, name='attendance-summary'),  # Rollup-based percentages/streaks
     path('attendance/<int:AttendanceID>/', attendance_detail, name='attendance-detail'),  # Retrieve, Update, Delete
 
     # Subject URLs
@@ -58,6 +61,7 @@ urlpatterns = [
 
     #Syllabus URLs
     path('syllabus/', syllabus_list, name='syllabus-list'),
+    path('syllabus-plans/stats/', syllabus_plan_stats, name='syllabus-plan-stats'),
     path('syllabus/<str:SyllabusID>/', syllabus_detail, name='syllabus-detail'),
 
     #Chapter URLs
@@ -77,5 +81,8 @@ urlpatterns = [
     path('marks/<str:MarksID>/', marks_detail, name='marks_detail'),  # To view/update/delete a specific marks entry
 
     path('alert-attendance/', send_attendance_alert, name='send_attendance_alert'),
-    path('alert-syllabus/', send_syllabus_alert, name='send_syllabus_alert')
+    path('alert-syllabus/', send_syllabus_alert, name='send_syllabus_alert'),
+
+    # Assistant (AIEngine) URLs
+    path('catalog/', catalog, name='catalog'),  # ID / name lists of the parameter fast path
 ]
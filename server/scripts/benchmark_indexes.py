@@ -0,0 +1,180 @@
+"""
+Benchmark of the hot attendance / timetable / marks / exam filters before and after
+migration 0005_hot_filter_indexes.
+
+Seeds a school-year dataset into a throwaway SQLite database (never db.sqlite3),
+then prints the query plan and median latency of every filter with and without
+the composite indexes.
+
+Usage (from server/):
+    python scripts/benchmark_indexes.py [--classrooms 20] [--students 40] [--days 200] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django
+from django.conf import settings
+
+BENCHMARK_DB = os.path.join(tempfile.mkdtemp(prefix="invoked-bench-"), "benchmark.sqlite3")
+settings.DATABASES['default']['NAME'] = BENCHMARK_DB
+django.setup()
+
+from django.core.management import call_command
+from apigateway.models import Subject, Teacher, Classroom, Student, Attendance, TimeTable, Syllabus, Exam, Marks
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+SUBJECTS = ["Mathematics", "Science", "Social", "Physics", "Chemistry"]
+YEAR_START = date(2024, 6, 3)
+
+
+def seed(classroom_count, students_per_class, school_days):
+    random.seed(42)
+    Subject.objects.bulk_create([Subject(SubjectID=subject) for subject in SUBJECTS])
+    teachers = Teacher.objects.bulk_create([
+        Teacher(TeacherID=f"T{t:03}", Name=f"Teacher {t}", DateofJoining=YEAR_START,
+                Phone=f"9{t:09}", SubjectID_id=SUBJECTS[t % len(SUBJECTS)])
+        for t in range(classroom_count * len(SUBJECTS))
+    ])
+    classrooms = Classroom.objects.bulk_create([
+        Classroom(ClassroomID=f"{7 + c // 4}{'ABCD'[c % 4]}{c}") for c in range(classroom_count)
+    ])
+    students = Student.objects.bulk_create([
+        Student(StudentID=f"{classroom.ClassroomID}_S{s:03}", Name=f"Student {s}", DateofJoining=YEAR_START,
+                ClassroomID=classroom, GuardianName="Guardian", GuardianRelation="Parent",
+                GuardianPhone="0000000000", Email=f"{classroom.ClassroomID}_{s}@school.test")
+        for classroom in classrooms for s in range(students_per_class)
+    ])
+
+    TimeTable.objects.bulk_create([
+        TimeTable(ClassroomID=classroom, Day=day, Slot=slot, SubjectID_id=random.choice(SUBJECTS))
+        for classroom in classrooms for day in DAYS for slot in range(1, 9)
+    ])
+
+    teaching_days = []
+    current = YEAR_START
+    while len(teaching_days) < school_days:
+        if current.weekday() < 6:
+            teaching_days.append(current)
+        current += timedelta(days=1)
+    Attendance.objects.bulk_create(
+        (Attendance(StudentID=student, Date=day, Status=int(random.random() < 0.9))
+         for student in students for day in teaching_days),
+        batch_size=5000,
+    )
+
+    syllabi = [
+        Syllabus(SyllabusID=f"{classroom.ClassroomID}_{subject}", ClassroomID=classroom,
+                 SubjectID_id=subject, TeacherID=teachers[c * len(SUBJECTS) + i])
+        for c, classroom in enumerate(classrooms) for i, subject in enumerate(SUBJECTS)
+    ]
+    Syllabus.objects.bulk_create(syllabi)  # bulk_create skips Syllabus.save(), IDs are set explicitly
+    exams = Exam.objects.bulk_create([
+        Exam(ExamID=f"{syllabus.SyllabusID}_E{e}", ExamName=f"Exam {e}",
+             DateOfExam=teaching_days[(e + 1) * len(teaching_days) // 12], SyllabusID=syllabus)
+        for syllabus in syllabi for e in range(10)
+    ])
+    students_by_class = {}
+    for student in students:
+        students_by_class.setdefault(student.ClassroomID_id, []).append(student)
+    Marks.objects.bulk_create(
+        (Marks(MarksID=f"{exam.ExamID}_{student.StudentID}", StudentID=student, ExamID=exam,
+               Marks=random.randint(20, 100))
+         for exam in exams for student in students_by_class[exam.SyllabusID.ClassroomID_id]),
+        batch_size=5000,
+    )
+    return classrooms, students, teaching_days, exams
+
+
+def hot_filters(classrooms, students, teaching_days, exams):
+    student = students[len(students) // 2]
+    classroom = classrooms[len(classrooms) // 2]
+    # About a month of school days, 30% into the seeded range (days 60-85 of the default 200)
+    first = len(teaching_days) * 3 // 10
+    month_start, month_end = teaching_days[first], teaching_days[min(first + 25, len(teaching_days) - 1)]
+    exam = exams[len(exams) // 2]
+    return {
+        "Attendance by (StudentID, Date range)":
+            Attendance.objects.filter(StudentID=student, Date__range=[month_start, month_end]),
+        "Attendance by classroom (student subquery, Date range)":
+            Attendance.objects.filter(
+                StudentID__in=Student.objects.filter(ClassroomID=classroom).values('StudentID'),
+                Date__range=[month_start, month_end]),
+        "Attendance of the whole school on one day":
+            Attendance.objects.filter(Date=month_start),
+        "TimeTable by (ClassroomID, Day, Slot)":
+            TimeTable.objects.filter(ClassroomID=classroom, Day="Wednesday", Slot=3),
+        "TimeTable by (SubjectID, ClassroomID)":
+            TimeTable.objects.filter(SubjectID="Mathematics", ClassroomID=classroom),
+        "Marks by (ExamID, StudentID)":
+            Marks.objects.filter(ExamID=exam, StudentID=student),
+        "Exam by DateOfExam range":
+            Exam.objects.filter(DateOfExam__range=[month_start, month_end]),
+        "Exam by (SyllabusID, DateOfExam range)":
+            Exam.objects.filter(SyllabusID=exam.SyllabusID_id, DateOfExam__gte=month_start),
+    }
+
+
+def measure(queries, runs):
+    results = {}
+    for name, queryset in queries.items():
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            list(queryset.all())  # .all() clones, so every run hits the database
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (statistics.median(timings), queryset.explain())
+    return results
+
+
+def report(title, results):
+    print(f"\n=== {title} ===")
+    for name, (latency, plan) in results.items():
+        print(f"\n{name}: {latency:.3f} ms (median)")
+        for line in plan.splitlines():
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--classrooms", type=int, default=20)
+    parser.add_argument("--students", type=int, default=40, help="students per classroom")
+    parser.add_argument("--days", type=int, default=200, help="school days of attendance")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    if min(args.classrooms, args.students, args.days, args.runs) < 1:
+        parser.error("--classrooms, --students, --days and --runs must be at least 1")
+
+    print(f"Benchmark database: {BENCHMARK_DB}")
+    call_command('migrate', 'apigateway', '0004', verbosity=0)
+    started = time.perf_counter()
+    dataset = seed(args.classrooms, args.students, args.days)
+    print(f"Seeded {Attendance.objects.count()} attendance rows, {Marks.objects.count()} marks, "
+          f"{TimeTable.objects.count()} timetable slots in {time.perf_counter() - started:.1f}s")
+
+    queries = hot_filters(*dataset)
+    before = measure(queries, args.runs)
+    report("Before 0005_hot_filter_indexes", before)
+
+    call_command('migrate', 'apigateway', '0005', verbosity=0)
+    after = measure(queries, args.runs)
+    report("After 0005_hot_filter_indexes", after)
+
+    print("\n=== Summary (median ms) ===")
+    for name in queries:
+        print(f"{before[name][0]:9.3f} -> {after[name][0]:9.3f}  {name}")
+
+    os.remove(BENCHMARK_DB)
+    os.rmdir(os.path.dirname(BENCHMARK_DB))
+
+
+if __name__ == "__main__":
+    main()